@@ -0,0 +1,60 @@
+"""
+Import-time benchmark for the pipeline entry points, based on `python -X importtime`
+
+Runs a fresh interpreter per repeat, keeps the best cumulative time of the target
+module and fails (exit 1) when it exceeds the budget or when a heavy dependency
+that should only load inside its stage shows up at import time
+
+    python scripts/bench_import_time.py --budget-ms 300
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ("unstructured", "matplotlib", "kaggle", "openai", "jinja2")
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def _importtime(module: str) -> tuple[float, set[str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    cumulative_us, loaded = 0, set()
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        name = m.group(4)
+        loaded.add(name.split(".")[0])
+        if name == module:
+            cumulative_us = int(m.group(2))
+    return cumulative_us / 1000.0, loaded
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time budget check (python -X importtime)")
+    ap.add_argument("--module", default="papers2code.graph", help="Module to import")
+    ap.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to run (best is kept)")
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("P2C_IMPORT_BUDGET_MS", "300")),
+                    help="Maximum cumulative import time of --module, in ms")
+    args = ap.parse_args()
+
+    runs = [_importtime(args.module) for _ in range(max(1, args.repeat))]
+    best = min(ms for ms, _ in runs)
+    heavy = sorted(set(HEAVY_MODULES) & set().union(*(loaded for _, loaded in runs)))
+
+    print(f"{args.module}: best {best:.1f} ms over {len(runs)} runs (budget {args.budget_ms:.0f} ms)")
+    if heavy:
+        print(f"Heavy modules imported eagerly: {', '.join(heavy)}")
+    if best > args.budget_ms or heavy:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Crash test for the SQLite job queue (papers2code.jobqueue) with stubbed pipeline steps
+
+Enqueues --jobs fake papers on a temporary database and starts --workers worker
+processes running the real work() loop and run_pipeline (stage hooks and state
+snapshots included) with the slow steps replaced by sleeps. One worker is killed
+with SIGKILL mid-lease and one gets SIGTERM mid-job, then a replacement worker
+starts. Fails (exit 1) unless every job ends done, each completed exactly once,
+and the SIGKILLed job was reclaimed after its lease expired
+
+    python scripts/check_job_queue.py --jobs 12 --workers 3
+"""
+import argparse
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def _run_worker(db: Path, lease_seconds: float, step_seconds: float) -> None:
+    """Worker process: the real queue loop and pipeline, with steps A and B stubbed"""
+    from papers2code import graph
+    from papers2code.jobqueue import work
+
+    def load_pdf_text(paper_source, log_dir=None):
+        time.sleep(step_seconds)
+        return f"Paper {Path(paper_source).name}\n\nStub text.", {"titles": [f"Paper {Path(paper_source).name}"]}
+
+    def extract_paper(paper_text, log_dir, sections=None):
+        time.sleep(step_seconds)
+        return [], {}  # no dataset mentions: the run ends cleanly after step B
+
+    stubs = {"load_pdf_text": load_pdf_text, "extract_paper": extract_paper}
+    graph._step_fn = stubs.__getitem__  # any other step would be a harness bug
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # as scripts/job_queue.py
+    try:
+        work(db, lease_seconds=lease_seconds, exit_when_idle=True, poll_seconds=0.2)
+    except KeyboardInterrupt:
+        print("Worker stopped", flush=True)
+
+
+def _spawn(args, db: Path, log: Path) -> subprocess.Popen:
+    cmd = [sys.executable, "-u", os.path.abspath(__file__), "--worker", str(db),
+           "--lease-seconds", str(args.lease_seconds), "--step-seconds", str(args.step_seconds)]
+    return subprocess.Popen(cmd, stdout=log.open("w"), stderr=subprocess.STDOUT)
+
+
+def _victim(db: Path, skip: set[int]) -> tuple[int, int] | None:
+    """(job id, worker pid) of a leased job past its first stage, on a worker not yet signalled"""
+    conn = sqlite3.connect(db, timeout=60)
+    try:
+        rows = conn.execute(
+            "SELECT j.id, j.lease_owner FROM jobs j JOIN stages s "
+            "ON s.job_id = j.id AND s.lease_token = j.lease_token WHERE j.status = 'leased'"
+        ).fetchall()
+    finally:
+        conn.close()
+    for job_id, owner in rows:
+        pid = int(owner.rsplit(":", 1)[1])
+        if pid not in skip:
+            return job_id, pid
+    return None
+
+
+def _wait_victim(db: Path, skip: set[int], timeout: float) -> tuple[int, int]:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        found = _victim(db, skip)
+        if found:
+            return found
+        time.sleep(0.05)
+    raise SystemExit("FAIL: no job reached a stage in time")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Job queue crash test: worker kills must neither lose nor repeat a paper")
+    ap.add_argument("--jobs", type=int, default=12, help="Fake papers to enqueue")
+    ap.add_argument("--workers", type=int, default=3, help="Worker processes started up front")
+    ap.add_argument("--lease-seconds", type=float, default=3.0, help="Lease length (a killed job is reclaimed after it)")
+    ap.add_argument("--step-seconds", type=float, default=0.5, help="Sleep of each stubbed step")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Give up after this many seconds")
+    ap.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.worker:
+        _run_worker(Path(args.worker), args.lease_seconds, args.step_seconds)
+        return
+
+    from papers2code.jobqueue import JobQueue
+
+    tmp = Path(tempfile.mkdtemp(prefix="p2c-queue-check-"))
+    db = tmp / "queue.sqlite"
+    papers = []
+    for i in range(args.jobs):
+        paper = tmp / "papers" / f"paper{i:02d}.pdf"
+        paper.parent.mkdir(parents=True, exist_ok=True)
+        paper.write_bytes(b"%PDF-1.4 stub\n")
+        papers.append(str(paper))
+    queue = JobQueue(db)
+    queue.enqueue(papers, tmp / "out")
+
+    logs = tmp / "logs"
+    logs.mkdir()
+    procs = [_spawn(args, db, logs / f"worker{i}.log") for i in range(args.workers)]
+
+    # SIGKILL: no cleanup at all, the job must come back once its lease expires
+    killed_job, pid = _wait_victim(db, set(), args.timeout)
+    os.kill(pid, signal.SIGKILL)
+    signalled = {pid}
+    print(f"SIGKILL worker {pid} during job {killed_job}")
+    # SIGTERM: the worker hands its job back without spending an attempt
+    if args.workers > 1:
+        termed_job, pid = _wait_victim(db, signalled, args.timeout)
+        os.kill(pid, signal.SIGTERM)
+        signalled.add(pid)
+        print(f"SIGTERM worker {pid} during job {termed_job}")
+    procs.append(_spawn(args, db, logs / "replacement.log"))
+
+    deadline = time.time() + args.timeout
+    for p in procs:
+        try:
+            p.wait(timeout=max(1.0, deadline - time.time()))
+        except subprocess.TimeoutExpired:
+            p.kill()
+            print(f"Worker {p.pid} did not finish in time")
+
+    completions = Counter()
+    for log in logs.glob("*.log"):
+        for m in re.finditer(r"\] job (\d+) done ->", log.read_text(encoding="utf-8", errors="replace")):
+            completions[int(m.group(1))] += 1
+    jobs = {j["id"]: j for j in queue.jobs()}
+    problems = [f"job {i}: {j['status']} (attempts {j['attempts']}, error {j['error']})"
+                for i, j in jobs.items() if j["status"] != "done"]
+    problems += [f"job {i}: completed {completions[i]} times" for i in jobs if completions[i] != 1]
+    if jobs[killed_job]["attempts"] < 2:
+        problems.append(f"job {killed_job}: SIGKILLed mid-lease but not reclaimed")
+
+    print(f"Jobs: {queue.counts()} | attempts: {dict(Counter(j['attempts'] for j in jobs.values()))}")
+    print(f"Logs and database: {tmp}")
+    if problems:
+        print("\n".join(problems))
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Local test of the pipeline service (papers2code.service) with stubbed LLM and Kaggle backends
+
+Starts PipelineService and its HTTP API on a free port with workers whose chat_json,
+OpenAI client and Kaggle client are stubs (the PDF loader too, so no PDF/OCR stack is
+needed); everything else is the real pipeline, a small CSV dataset included. Submits
+jobs over HTTP and polls them, then SIGKILLs a worker mid-job. Fails (exit 1) unless
+both first jobs end done on a worker warmed at start-up, the second one reusing the
+warm worker of the first, and the job after the kill runs on a freshly re-warmed pool
+
+    python scripts/check_service.py
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+
+class _StubKaggleApi:
+    """The KaggleApi calls made by papers2code.tools.kaggle_client, over one small CSV dataset"""
+
+    ROWS = 200
+
+    def dataset_list(self, search):
+        return [SimpleNamespace(ref="stub/iris-measurements", title="Iris measurements", size=8000)]
+
+    def dataset_view(self, ref):
+        return SimpleNamespace(licenseName="CC0-1.0")
+
+    def dataset_list_files(self, ref):
+        return SimpleNamespace(files=[SimpleNamespace(name="iris.csv", totalBytes=8000, type="csv")])
+
+    def dataset_download_files(self, ref, path, unzip=True, quiet=False):
+        lines = ["sepal_length,sepal_width,species"]
+        lines += [f"{4 + i % 40 / 10:.1f},{2 + i % 25 / 10:.1f},{('setosa', 'versicolor', 'virginica')[i % 3]}"
+                  for i in range(self.ROWS)]
+        (Path(path) / "iris.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _stub_worker(step_seconds: float) -> None:
+    """Pool initializer: install the stubs, then warm up exactly as the service does"""
+    from papers2code import graph
+    from papers2code.llm import openai_client
+    from papers2code.nodes import paper_extractor
+    from papers2code.service import _warm_worker
+    from papers2code.tools import kaggle_client
+
+    def load_pdf_text(paper_source, log_dir=None):
+        return f"Paper {Path(paper_source).name}\n\nWe train on the Iris dataset.", {"titles": []}
+
+    def chat_json(prompt, system=None, log_dir=None, log_name="default"):
+        time.sleep(step_seconds)
+        return {
+            "candidates": [{"name": "Iris", "url_if_any": None, "context_snippet": "the Iris dataset",
+                            "confidence": 0.9}],
+            "method_spec": {"dataset": {"name": "Iris", "num_classes": 3}},
+        }
+
+    real_step_fn = graph._step_fn
+    graph._step_fn = lambda name: load_pdf_text if name == "load_pdf_text" else real_step_fn(name)
+    paper_extractor.chat_json = chat_json
+    openai_client.client = lambda: SimpleNamespace(chat=None)
+    kaggle_client._api = _StubKaggleApi()
+    _warm_worker()
+
+
+def _request(url: str, payload: dict | None = None) -> dict:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+def _wait_job(base: str, job_id: str, timeout: float, until=("done", "failed")) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = _request(f"{base}/jobs/{job_id}")
+        if info["status"] in until:
+            return info
+        time.sleep(0.1)
+    raise SystemExit(f"FAIL: job {job_id} still {info['status']} after {timeout:.0f}s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pipeline service check: warm workers are reused and re-warmed after a crash")
+    ap.add_argument("--step-seconds", type=float, default=0.5, help="Latency of the stubbed LLM call")
+    ap.add_argument("--timeout", type=float, default=300.0, help="Give up on a job after this many seconds")
+    args = ap.parse_args()
+
+    from papers2code.service import PipelineService, _handler
+
+    class StubService(PipelineService):
+        def _new_pool(self) -> ProcessPoolExecutor:  # as PipelineService, warming through the stubs
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_stub_worker, initargs=(args.step_seconds,))
+
+    tmp = Path(tempfile.mkdtemp(prefix="p2c-service-check-"))
+    paper = tmp / "paper.pdf"
+    paper.write_bytes(b"%PDF-1.4 stub\n")
+    service = StubService(tmp / "jobs", workers=1)
+    t = time.perf_counter()
+    service.start()
+    print(f"Pool warm in {time.perf_counter() - t:.2f}s: {service.warm}")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def run(name: str) -> dict:
+        job = _request(f"{base}/jobs", {"paper": str(paper), "use_memo": False})
+        info = _wait_job(base, job["id"], args.timeout)
+        print(f"{name}: {info['status']} on worker {info['worker_pid']} in "
+              f"{(info['finished_at'] or 0) - (info['started_at'] or 0):.2f}s {info['error'] or ''}")
+        return info
+
+    problems = []
+    try:
+        warm_pids = {w["pid"] for w in service.warm}
+        first, second = run("job 1"), run("job 2")
+        for name, info in (("job 1", first), ("job 2", second)):
+            if info["status"] != "done":
+                problems.append(f"{name}: {info['status']} ({info['error']})")
+            elif info["worker_pid"] not in warm_pids:
+                problems.append(f"{name}: ran on worker {info['worker_pid']}, not one warmed at start-up")
+        if second["worker_pid"] != first["worker_pid"]:
+            problems.append("job 2 did not reuse the warm worker of job 1")
+
+        # a worker dies mid-job: that job fails, the next one gets a new, re-warmed pool
+        job = _request(f"{base}/jobs", {"paper": str(paper), "use_memo": False})
+        _wait_job(base, job["id"], args.timeout, until=("running", "done", "failed"))
+        time.sleep(args.step_seconds / 2)
+        os.kill(first["worker_pid"], signal.SIGKILL)
+        print(f"SIGKILL worker {first['worker_pid']} during job {job['id']}")
+        _wait_job(base, job["id"], args.timeout)
+        after = run("job after crash")
+        rewarmed = {w["pid"] for w in _request(f"{base}/metrics")["warm"]}
+        if after["status"] != "done":
+            problems.append(f"job after crash: {after['status']} ({after['error']})")
+        if rewarmed & warm_pids or after["worker_pid"] not in rewarmed:
+            problems.append(f"pool not re-warmed after the crash (warm workers {sorted(rewarmed)})")
+    finally:
+        server.shutdown()
+        service.shutdown()
+
+    print(f"Metrics: {json.dumps(service.metrics()['jobs'])} | artifacts: {tmp}")
+    if problems:
+        print("\n".join(problems))
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import argparse
+import json
+import signal
+from pathlib import Path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Shared SQLite paper queue: enqueue papers, run workers, show status")
+    ap.add_argument("--db", default="artifacts/queue.sqlite", help="Queue database (on the shared filesystem)")
+    ap.add_argument("--no-wal", action="store_true",
+                    help="Rollback journal instead of WAL (needed when workers on several hosts share an NFS/SMB mount)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    enq = sub.add_parser("enqueue", help="Add paper sources (already queued ones are ignored)")
+    enq.add_argument("papers", nargs="+", help="PDF paths or URLs")
+    enq.add_argument("--out-root", default="artifacts/papers", help="Parent folder of per-paper output directories")
+
+    wk = sub.add_parser("work", help="Claim and process jobs until stopped")
+    wk.add_argument("--lease-seconds", type=float, default=120.0, help="Lease length (heartbeat every third of it)")
+    wk.add_argument("--max-jobs", type=int, default=None, help="Exit after completing this many jobs")
+    wk.add_argument("--exit-when-idle", action="store_true", help="Exit once nothing is queued or leased")
+
+    sub.add_parser("status", help="Job counts and per-job state as JSON")
+    args = ap.parse_args()
+
+    # imported after argument parsing so --help and usage errors return instantly
+    from papers2code.jobqueue import JobQueue, work
+
+    db = Path(args.db)
+    if args.cmd == "enqueue":
+        added = JobQueue(db, wal=not args.no_wal).enqueue(args.papers, Path(args.out_root))
+        print(f"Enqueued {added} new paper(s) ({len(args.papers) - added} already queued)")
+    elif args.cmd == "work":
+        # SIGTERM behaves like Ctrl-C: the current job is handed back without spending an attempt
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            done = work(db, lease_seconds=args.lease_seconds, wal=not args.no_wal,
+                        max_jobs=args.max_jobs, exit_when_idle=args.exit_when_idle)
+            print(f"Worker finished: {done} job(s) completed")
+        except KeyboardInterrupt:
+            print("Worker stopped")
+    else:
+        queue = JobQueue(db, wal=not args.no_wal)
+        print(json.dumps({"counts": queue.counts(), "jobs": queue.jobs()}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,25 @@
 import argparse
 from pathlib import Path
 
-from papers2code.graph import run_pipeline
-
 
 def main():
     ap = argparse.ArgumentParser(description="Paper → Kaggle → Code scaffold → Wiki")
     ap.add_argument("--paper", required=True, help="Path to PDF or URL")
     ap.add_argument("--out", default="artifacts", help="Output directory")
+    ap.add_argument("--no-memo", action="store_true",
+                    help="Ignore the dataset-name -> Kaggle ref memo and re-run search/selection")
+    ap.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "sample"],
+                    help="Profile each stage into <out>/profiles/ (cprofile: .pstats + collapsed stacks, "
+                         "sample: collapsed stacks only)")
+    ap.add_argument("--profile-top", type=int, default=25, help="Hot functions listed per stage in the summary")
     args = ap.parse_args()
 
+    # imported after argument parsing so --help and usage errors return instantly
+    from papers2code.graph import run_pipeline
+
     Path(args.out).mkdir(parents=True, exist_ok=True)
-    run_pipeline(paper_source=args.paper, out_dir=Path(args.out))
+    run_pipeline(paper_source=args.paper, out_dir=Path(args.out), use_memo=not args.no_memo,
+                 profile=args.profile, profile_top=args.profile_top)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,22 @@
+import argparse
+import os
+from pathlib import Path
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Paper → Code pipeline service (warm workers, HTTP job API)")
+    ap.add_argument("--host", default="127.0.0.1", help="Bind address")
+    ap.add_argument("--port", type=int, default=8765, help="Bind port (0 picks a free one)")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                    help="Pre-warmed worker processes")
+    ap.add_argument("--out-root", default="artifacts/jobs", help="Parent folder of per-job output directories")
+    args = ap.parse_args()
+
+    # imported after argument parsing so --help and usage errors return instantly
+    from papers2code.service import serve
+
+    Path(args.out_root).mkdir(parents=True, exist_ok=True)
+    serve(args.host, args.port, Path(args.out_root), args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -7,5 +7,16 @@ class Settings(BaseModel):
     artifacts_dir: Path = Path(os.getenv("P2C_ARTIFACTS_DIR", "./artifacts"))
     samples_max_rows: int = int(os.getenv("P2C_SAMPLES_MAX_ROWS", "50000"))
     image_sample_max: int = int(os.getenv("P2C_IMAGE_SAMPLE_MAX", "300"))
+    sample_format: str = os.getenv("P2C_SAMPLE_FORMAT", "shard")  # "shard" | "folders"
+    llm_chunk_tokens: int = int(os.getenv("P2C_LLM_CHUNK_TOKENS", "25000"))  # per extraction call on long papers
+    llm_workers: int = int(os.getenv("P2C_LLM_WORKERS", "4"))  # concurrent extraction calls
+    memo_path: Path = Path(os.getenv("P2C_MEMO_PATH", "~/.cache/papers2code/resolution_memo.json")).expanduser()
+    memo_max_age_days: float = float(os.getenv("P2C_MEMO_MAX_AGE_DAYS", "30"))
+    ocr_min_chars: int = int(os.getenv("P2C_OCR_MIN_CHARS", "200"))  # pages with less text layer are OCR'd
+    ocr_workers: int = int(os.getenv("P2C_OCR_WORKERS", str(os.cpu_count() or 1)))
+    ocr_dpi: int = int(os.getenv("P2C_OCR_DPI", "300"))
+    ocr_lang: str = os.getenv("P2C_OCR_LANG", "eng")
+    ocr_cache_dir: Path = Path(os.getenv("P2C_OCR_CACHE_DIR", "~/.cache/papers2code/ocr")).expanduser()
+    template_cache_dir: Path = Path(os.getenv("P2C_TEMPLATE_CACHE_DIR", "~/.cache/papers2code/jinja")).expanduser()
 
 settings = Settings()
@@ -1,40 +1,71 @@
+import importlib
 import json
+import os
 import time
+from functools import cache
 from pathlib import Path
+from typing import Callable
 
-from papers2code.state import PipelineState
+from papers2code.snapshot import open_snapshot, save_snapshot
+from papers2code.state import PipelineState, section_spans
 from papers2code.config import settings
-
-# Step A: PDF -> text
-from papers2code.tools.pdf_loader import load_pdf_text
 from papers2code.tools.artifacts import write_text
 
-# Step B: Paper -> dataset mentions (LLM, logs prompt/response)
-from papers2code.nodes.dataset_mention_extractor import extract_dataset_mentions
 
-# Step C: Probe Kaggle (no download): search + list files + score
-from papers2code.nodes.dataset_resolver import probe_kaggle_matches
+# Step registry: name -> (module, attribute). Step modules (and the heavy deps they
+# pull in: unstructured, kaggle, openai, matplotlib, jinja2) are imported
+# on first use, so importing this module or stopping early never pays for later stages
+_STEPS: dict[str, tuple[str, str]] = {
+    # Step A: PDF -> text
+    "load_pdf_text": ("papers2code.tools.pdf_loader", "load_pdf_text"),
+    # Step B: Paper -> dataset mentions + method spec (one validated LLM call, logs prompt/response)
+    "extract_paper": ("papers2code.nodes.paper_extractor", "extract_paper"),
+    # Step C/D shortcut: name -> chosen ref memo (files re-listed to check the ref still exists)
+    "lookup_resolution": ("papers2code.tools.resolution_memo", "lookup_resolution"),
+    "store_resolution": ("papers2code.tools.resolution_memo", "store_resolution"),
+    "kaggle_list_files": ("papers2code.tools.kaggle_client", "kaggle_list_files"),
+    # Step C: Probe Kaggle (no download): search + list files + score
+    "probe_kaggle_matches": ("papers2code.nodes.dataset_resolver", "probe_kaggle_matches"),
+    # Step D: Select one winner with transparent rationale
+    "choose_best_match": ("papers2code.nodes.selector", "choose_best_match"),
+    # Step E: Download chosen dataset
+    "kaggle_download_dataset": ("papers2code.tools.kaggle_client", "kaggle_download_dataset"),
+    # One scandir pass over the download, persisted next to it and shared by the steps below
+    "dataset_index": ("papers2code.tools.file_index", "dataset_index"),
+    # Step F/G/H/I: Modality-aware sampling + profiling + EDA + dataset card
+    "guess_modality": ("papers2code.tools.modality", "guess_modality"),
+    "compute_dataset_stats": ("papers2code.tools.dataset_stats", "compute_dataset_stats"),
+    "sample_images_auto": ("papers2code.tools.image_sampler", "sample_images_auto"),
+    "analyze_images": ("papers2code.tools.image_analysis", "analyze_images"),
+    "profile_images": ("papers2code.tools.image_profiler", "profile_images"),
+    "profile_tabular": ("papers2code.tools.tabular_profiler", "profile_tabular"),
+    "has_text_table": ("papers2code.tools.text_profiler", "has_text_table"),
+    "profile_text": ("papers2code.tools.text_profiler", "profile_text"),
+    "save_class_bar_chart": ("papers2code.tools.image_eda", "save_class_bar_chart"),
+    "grid_entries": ("papers2code.tools.image_eda", "grid_entries"),
+    "save_sample_grid": ("papers2code.tools.image_eda", "save_sample_grid"),
+    # Step J/K/L: Methods -> Code scaffold -> Wiki
+    "complete_method_spec": ("papers2code.nodes.methods_extractor", "complete_method_spec"),
+    "render_code_templates": ("papers2code.nodes.code_synthesizer", "render_code_templates"),
+    "compose_wiki": ("papers2code.nodes.wiki_composer", "compose_wiki"),
+}
 
-# Step D: Select one winner with transparent rationale
-from papers2code.nodes.selector import choose_best_match
 
-# Step E: Download chosen dataset
-from papers2code.tools.kaggle_client import kaggle_download_dataset
+@cache
+def _step_fn(name: str) -> Callable:
+    module, attr = _STEPS[name]
+    return getattr(importlib.import_module(module), attr)
 
-# Step F/G/H/I: Modality-aware sampling + profiling + EDA + dataset card
-from papers2code.tools.modality import guess_modality
-from papers2code.tools.image_sampler import sample_images_auto
-from papers2code.tools.image_profiler import profile_images
-from papers2code.tools.image_eda import save_class_bar_chart, save_sample_grid
 
-# Step J/K/L: Methods -> Code scaffold -> Wiki
-from papers2code.nodes.methods_extractor import extract_methods
-from papers2code.nodes.code_synthesizer import render_code_templates
-from papers2code.nodes.wiki_composer import compose_wiki
+# Callbacks notified with the title of each stage as it starts, while run_pipeline runs
+# (StageProfiler.begin with profile=..., on_stage for job queues)
+_stage_listeners: list[Callable[[str], None]] = []
 
 
 def _step(title: str):
     print(f"\n=== {title} ===")
+    for listener in _stage_listeners:
+        listener(title)
 
 
 t0 = time.perf_counter()
@@ -46,6 +77,7 @@ def _write_image_dataset_card(
     url: str | None,
     license_name: str | None,
     img_profile: dict,
+    full_stats: dict | None = None,
 ) -> None:
     lines: list[str] = []
     lines.append(f"# Dataset Card — {title}")
@@ -61,7 +93,30 @@ def _write_image_dataset_card(
     for k, v in (img_profile.get("per_class") or {}).items():
         lines.append(f"- {k}: {v}")
     lines.append(f"- Approx duplicate rate (phash): {img_profile.get('approx_duplicate_rate', 0.0):.3f}")
+    if img_profile.get("undecodable"):
+        lines.append(f"- Undecodable images (sample): {img_profile['undecodable']}")
+    quality = [(key, img_profile.get(key)) for key in ("aspect", "brightness", "contrast", "blur")]
+    if any(summary for _, summary in quality):
+        lines.append("### Quality (sample; mean / median / p5-p95)")
+        for key, s in quality:
+            if s:
+                lines.append(f"- {key.capitalize()}: {s['mean']} / {s['median']} / {s['p5']}-{s['p95']}")
+        lines.append(f"- Likely blurry (Laplacian variance < 100): {img_profile.get('likely_blurry_rate', 0.0):.3f}")
     lines.append("")
+    if full_stats:
+        lines += [
+            "## Full Dataset Statistics",
+            f"- Total images: {full_stats.get('total_images', 0)}",
+            f"- Channel mean (RGB, 0-1): {full_stats.get('mean')}",
+            f"- Channel std (RGB, 0-1): {full_stats.get('std')}",
+            "### Image sizes (WxH)",
+        ]
+        for k, v in list((full_stats.get("size_hist") or {}).items())[:10]:
+            lines.append(f"- {k}: {v}")
+        lines.append("### Per-class")
+        for k, v in (full_stats.get("class_counts") or {}).items():
+            lines.append(f"- {k}: {v}")
+        lines.append("")
     lines += [
         "## Quick EDA",
         "- See `eda/class_counts.png` and `eda/sample_grid.png`.",
@@ -69,26 +124,189 @@ def _write_image_dataset_card(
     write_text(out_dir / "dataset_card.md", "\n".join(lines))
 
 
-def run_pipeline(paper_source: str, out_dir: Path) -> PipelineState:
+def _write_tabular_dataset_card(
+    out_dir: Path,
+    title: str,
+    url: str | None,
+    license_name: str | None,
+    tab_profile: dict,
+) -> None:
+    lines: list[str] = []
+    lines.append(f"# Dataset Card — {title}")
+    if url:
+        lines.append(f"- Kaggle: {url}")
+    lines.append(f"- License: {license_name or 'Unknown'}")
+    lines.append(f"- Tabular files: {', '.join(tab_profile.get('files') or []) or 'none found'}")
+    lines.append("")
+    for table in tab_profile.get("tables") or []:
+        trunc = f" (first {table['rows_profiled']} rows)" if table.get("truncated") else ""
+        lines += [
+            f"## {table['file']}",
+            f"- Rows profiled: {table['rows_profiled']}{trunc}",
+            "",
+            "| column | type | null rate | distinct (approx) | p0 / p25 / p50 / p75 / p100 |",
+            "|---|---|---|---|---|",
+        ]
+        for name, col in (table.get("columns") or {}).items():
+            qs = col.get("quantiles")
+            q_txt = " / ".join(f"{v:.4g}" for v in qs.values()) if qs else "-"
+            lines.append(f"| {name} | {col['type']} | {col['null_rate']:.3f} | {col['distinct_estimate']} | {q_txt} |")
+        target = table.get("target")
+        if target:
+            lines += ["", f"### Target balance — `{target['column']}` (imbalance ratio {target['imbalance_ratio']})"]
+            for k, v in target["counts"].items():
+                lines.append(f"- {k}: {v}")
+        lines.append("")
+    write_text(out_dir / "dataset_card.md", "\n".join(lines))
+
+
+def _write_text_dataset_card(
+    out_dir: Path,
+    title: str,
+    url: str | None,
+    license_name: str | None,
+    text_profile: dict,
+) -> None:
+    lines: list[str] = []
+    lines.append(f"# Dataset Card — {title}")
+    if url:
+        lines.append(f"- Kaggle: {url}")
+    lines.append(f"- License: {license_name or 'Unknown'}")
+    lines.append(f"- Text files: {len(text_profile.get('files') or [])}")
+    lines.append("")
+    trunc = " (profiling stopped at samples_max_rows)" if text_profile.get("truncated") else ""
+    lines += [
+        "## Corpus Profile",
+        f"- Documents: {text_profile.get('documents', 0)}{trunc}",
+        f"- Mean length (chars): {text_profile.get('mean_chars', 0.0)}",
+        f"- Length quantiles (chars): {text_profile.get('length_chars')}",
+        f"- Length quantiles (tokens): {text_profile.get('length_tokens')}",
+        f"- Vocabulary size (approx, HyperLogLog): {text_profile.get('vocab_size_estimate', 0)}",
+        f"- Near-duplicate rate (MinHash/LSH): {text_profile.get('near_duplicate_rate', 0.0):.3f}",
+        "",
+    ]
+    labels = text_profile.get("labels")
+    if labels:
+        lines.append(f"### Label balance (imbalance ratio {text_profile.get('imbalance_ratio')})")
+        for k, v in list(labels.items())[:50]:
+            lines.append(f"- {k}: {v}")
+        lines.append("")
+    write_text(out_dir / "dataset_card.md", "\n".join(lines))
+
+
+def _profile_image_dataset(st: PipelineState, winner: dict, slug: str, ds_dir: Path, out_dir: Path) -> dict:
+    """Step F/G/H/I for image datasets: full-dataset stats, sampling, profile, EDA and card"""
+    _step("F-G-H. Sample, profile & EDA")
+    full_stats = _step_fn("compute_dataset_stats")(ds_dir)
+    st.dataset_profile["full"] = full_stats
+    (out_dir / "dataset_stats.json").write_text(
+        json.dumps(full_stats, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    per_class = settings.image_sample_max if hasattr(settings, "image_sample_max") else 50
+    sample_path, per_class_counts, broken = _step_fn("sample_images_auto")(
+        ds_dir, out_dir, per_class=int(per_class), max_total=int(per_class) * 10
+    )
+
+    # Step H: Profile + EDA from one decode of each sampled image (grid thumbnails included)
+    grid = _step_fn("grid_entries")(sample_path, grid=10, per_class_columns=True)
+    analysis = _step_fn("analyze_images")(sample_path, thumbnails=grid, cell=96)
+    analysis.save(out_dir / "eda" / "image_analysis.npz")
+    img_profile = _step_fn("profile_images")(sample_path, analysis=analysis)
+    st.dataset_profile["sample"] = img_profile
+    _step_fn("save_class_bar_chart")(per_class_counts, out_dir / "eda" / "class_counts.png")
+    _step_fn("save_sample_grid")(
+        sample_path, out_dir / "eda" / "sample_grid.png", grid=10, per_class_columns=True, cell=96, analysis=analysis
+    )
+
+    # Step I: Dataset Card
+    _write_image_dataset_card(
+        out_dir=out_dir,
+        title=winner.get("title") or slug,
+        url=winner.get("url"),
+        license_name=winner.get("license"),
+        img_profile=img_profile,
+        full_stats=full_stats,
+    )
+
+    # Console: Sampling Summary
+    print(f"Sample: {sample_path}")
+    print(f"Classes (sample): {len(per_class_counts)} | Broken files skipped: {broken}")
+    print("Artifacts: dataset_card.md, dataset_stats.json, eda/class_counts.png, eda/sample_grid.png, "
+          "eda/image_analysis.npz")
+
+    return full_stats
+
+
+def run_pipeline(
+    paper_source: str,
+    out_dir: Path,
+    use_memo: bool = True,
+    profile: str | None = None,
+    profile_top: int = 25,
+    on_stage: Callable[[str], None] | None = None,
+) -> PipelineState:
     """
     Main graph workflow
     Runs the agent in 8 steps from paper ingestion to template eneration
     parameters:
         paper_source (str): The paper path (from the cli call relative call)
         out_dir (str): The save folder (created if doesn't exist)
+        use_memo (bool): Reuse the memoized Kaggle ref for a dataset name resolved before
+            (False re-runs search and selection; the fresh result still refreshes the memo)
+        profile (str | None): "cprofile" or "sample" to profile every stage into out_dir/profiles/
+        profile_top (int): Hot functions listed per stage in profiles/summary.txt
+        on_stage (Callable | None): Called with each stage title as the stage starts;
+            an exception raised by it aborts the run
+    The state is snapshotted to out_dir/state/ before every stage and at the end
+    (see papers2code.snapshot); a rerun into the same out_dir reuses its paper text
     """
+    global _stage_listeners
     out_dir.mkdir(parents=True, exist_ok=True)
     st = PipelineState(paper_source=paper_source)
+    snap_dir = out_dir / "state"
+
+    def snapshot(title: str) -> None:
+        if st.paper_text:  # nothing worth saving before Step A (and keep an older snapshot intact)
+            save_snapshot(st, snap_dir, stage=f"before {title}")
+
+    profiler = None
+    if profile:
+        from papers2code.tools.profiling import StageProfiler
+        profiler = StageProfiler(out_dir / "profiles", mode=profile, top=profile_top)
+    _stage_listeners = [fn for fn in (snapshot, profiler and profiler.begin, on_stage) if fn]
+    finished = False
+    try:
+        _run_pipeline(st, out_dir, use_memo)
+        finished = True
+        return st
+    finally:
+        _stage_listeners = []
+        if st.paper_text:
+            save_snapshot(st, snap_dir, stage="done" if finished else "failed")
+        if profiler:
+            summary = profiler.close()
+            print(f"\nProfiles written -> {summary.parent} (summary: {summary.name})")
+
 
-    # Step A: Load paper text from pdf
+def _run_pipeline(st: PipelineState, out_dir: Path, use_memo: bool) -> PipelineState:
+    paper_source = st.paper_source
+
+    # Step A: Load paper text from pdf (or from the snapshot of an earlier run of this paper)
     _step("A. Load paper")
-    paper_text, sections = load_pdf_text(paper_source)
-    st.paper_text = paper_text
-    st.sections = sections
+    snap = open_snapshot(out_dir / "state")
+    if snap and snap.matches(paper_source):
+        st.paper_text, st.sections = snap.paper_text, snap.sections
+        print(f"Reusing paper text from snapshot ({snap.manifest['paper_text']['bytes']} bytes)")
+    else:
+        paper_text, sections = _step_fn("load_pdf_text")(paper_source, log_dir=out_dir)
+        st.paper_text = paper_text
+        st.sections = section_spans(paper_text, sections)
 
-    # Step B: Extract dataset mentions (LLM)
-    _step("B. Extract dataset mentions")
-    st.dataset_candidates = extract_dataset_mentions(st.paper_text, log_dir=out_dir)
+    # Step B: Extract dataset mentions and the method spec (one LLM call)
+    _step("B. Extract dataset mentions + methods (LLM)")
+    st.dataset_candidates, st.method_spec = _step_fn("extract_paper")(
+        st.paper_text, log_dir=out_dir, sections={"titles": st.section_texts("titles")}
+    )
     (out_dir / "candidates.json").write_text(
         json.dumps(st.dataset_candidates, indent=2, ensure_ascii=False),
         encoding="utf-8",
@@ -100,37 +318,51 @@ def run_pipeline(paper_source: str, out_dir: Path) -> PipelineState:
         print(msg)
         return st
 
-    # Step C: Probe Kaggle matches
-    _step("C. Probe Kaggle")
-    matches = probe_kaggle_matches(st.dataset_candidates, max_checks_per_name=8)
-    (out_dir / "resolver_matches.json").write_text(
-        json.dumps(matches, indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
-    if not matches:
-        msg = "No Kaggle matches found for extracted names."
-        st.issues.append(msg)
-        write_text(out_dir / "report.txt", msg)
-        print(msg)
-        return st
-
-    # Step D: Select one winner with transparent rationale
-    _step("D. Select match")
+    # Step C/D shortcut: a dataset name resolved by an earlier run skips search and selection
     paper_primary = next((c.get("name") for c in st.dataset_candidates if c.get("name")), None)
-    winner, rationale = choose_best_match(matches, paper_primary_name=paper_primary)
-    selection = {"winner": winner, "rationale": rationale, "alternatives": matches[:10]}
-    (out_dir / "selection.json").write_text(
-        json.dumps(selection, indent=2, ensure_ascii=False), encoding="utf-8"
-    )
-    if not winner:
-        msg = "Selection failed - no winner after tie-breakers"
-        st.issues.append(msg)
-        write_text(out_dir / "report.txt", msg)
-        print(msg)
-        return st
+    hit = None
+    if use_memo and paper_primary:
+        hit = _step_fn("lookup_resolution")(paper_primary, list_files=_step_fn("kaggle_list_files"))
+    if hit:
+        _step("C-D. Resolution memo hit")
+        winner, rationale = hit
+        selection = {"winner": winner, "rationale": rationale, "alternatives": [], "memo": True}
+        (out_dir / "selection.json").write_text(
+            json.dumps(selection, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+    else:
+        # Step C: Probe Kaggle matches
+        _step("C. Probe Kaggle")
+        matches = _step_fn("probe_kaggle_matches")(st.dataset_candidates, max_checks_per_name=8)
+        (out_dir / "resolver_matches.json").write_text(
+            json.dumps(matches, indent=2, ensure_ascii=False),
+            encoding="utf-8",
+        )
+        if not matches:
+            msg = "No Kaggle matches found for extracted names."
+            st.issues.append(msg)
+            write_text(out_dir / "report.txt", msg)
+            print(msg)
+            return st
+
+        # Step D: Select one winner with transparent rationale
+        _step("D. Select match")
+        winner, rationale = _step_fn("choose_best_match")(matches, paper_primary_name=paper_primary)
+        selection = {"winner": winner, "rationale": rationale, "alternatives": matches[:10]}
+        (out_dir / "selection.json").write_text(
+            json.dumps(selection, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        if not winner:
+            msg = "Selection failed - no winner after tie-breakers"
+            st.issues.append(msg)
+            write_text(out_dir / "report.txt", msg)
+            print(msg)
+            return st
+        if paper_primary:
+            _step_fn("store_resolution")(paper_primary, winner, rationale)
 
     # Console: short summary pre-download
-    modality = guess_modality(winner.get("files") or [])
+    modality = _step_fn("guess_modality")(winner.get("files") or [])
     print(f"Chosen: {winner['ref']}  |  Title: {winner.get('title')}  |  Modality: {modality}")
     if winner.get("url"):
         print(f"Dataset URL: {winner.get('url')}")
@@ -142,51 +374,79 @@ def run_pipeline(paper_source: str, out_dir: Path) -> PipelineState:
     if ds_dir.exists() and any(ds_dir.iterdir()):
         print(f"Cache hit: {ds_dir} already exists — skipping download.")
     else:
-        kaggle_download_dataset(slug, ds_dir)
+        _step_fn("kaggle_download_dataset")(slug, ds_dir)
     print(f"Downloaded to: {ds_dir}")
     st.sample_dir = str(ds_dir)
+    index = _step_fn("dataset_index")(ds_dir, refresh=True)
+    print(f"File index: {len(index.entries)} files ({index.scanned} dirs listed, {index.reused} unchanged)")
+    if index.entries:  # the local files are authoritative (Kaggle listings can be truncated)
+        modality = _step_fn("guess_modality")(index.listing())
 
-    # Step F/G: Sample images automatically
-    _step("F-G-H. Sample, profile & EDA")
-    per_class = settings.image_sample_max if hasattr(settings, "image_sample_max") else 50
-    sample_dir, per_class_counts, broken = sample_images_auto(
-        ds_dir, out_dir, per_class=int(per_class), max_total=int(per_class) * 10
-    )
-
-    # Step H: Profile + EDA
-    img_profile = profile_images(sample_dir)
-    (out_dir / "eda").mkdir(parents=True, exist_ok=True)
-    save_class_bar_chart(per_class_counts, out_dir / "eda" / "class_counts.png")
-    save_sample_grid(sample_dir, out_dir / "eda" / "sample_grid.png")
+    # CSV/Parquet files that hold documents are profiled as a text corpus
+    if modality == "tabular" and _step_fn("has_text_table")(ds_dir):
+        modality = "text"
+        print("Tabular files contain a document column — profiling as text")
 
-    # Step I: Dataset Card
-    _write_image_dataset_card(
-        out_dir=out_dir,
-        title=winner.get("title") or slug,
-        url=winner.get("url"),
-        license_name=winner.get("license"),
-        img_profile=img_profile,
-    )
-
-    # Console: Sampling Summary
-    print(f"Sample dir: {sample_dir}")
-    print(f"Classes (sample): {len(per_class_counts)} | Broken files skipped: {broken}")
-    print("Artifacts: dataset_card.md, eda/class_counts.png, eda/sample_grid.png")
+    # Step F/G/H/I (tabular/text): streaming profile (bounded by samples_max_rows) + card
+    full_stats = None
+    if modality == "text":
+        _step("F-G-H. Profile text corpus")
+        text_profile = _step_fn("profile_text")(ds_dir, max_docs=settings.samples_max_rows)
+        st.dataset_profile["text"] = text_profile
+        (out_dir / "text_profile.json").write_text(
+            json.dumps(text_profile, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        _write_text_dataset_card(
+            out_dir=out_dir,
+            title=winner.get("title") or slug,
+            url=winner.get("url"),
+            license_name=winner.get("license"),
+            text_profile=text_profile,
+        )
+        print(f"Documents profiled: {text_profile['documents']} (max {settings.samples_max_rows})")
+        print("Artifacts: dataset_card.md, text_profile.json")
+    elif modality == "tabular":
+        _step("F-G-H. Profile tabular dataset")
+        tab_profile = _step_fn("profile_tabular")(ds_dir, max_rows=settings.samples_max_rows)
+        st.dataset_profile["tabular"] = tab_profile
+        (out_dir / "tabular_profile.json").write_text(
+            json.dumps(tab_profile, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        _write_tabular_dataset_card(
+            out_dir=out_dir,
+            title=winner.get("title") or slug,
+            url=winner.get("url"),
+            license_name=winner.get("license"),
+            tab_profile=tab_profile,
+        )
+        rows = sum(t["rows_profiled"] for t in tab_profile["tables"])
+        print(f"Tables profiled: {len(tab_profile['tables'])} | Rows: {rows} (max {settings.samples_max_rows})")
+        print("Artifacts: dataset_card.md, tabular_profile.json")
+    else:
+        full_stats = _profile_image_dataset(st, winner, slug, ds_dir, out_dir)
 
-    # Step J: Methods extractor (LLM with logging & CIFAR-10 defaults)
-    _step("J. Extract Methods (LLM)")
-    method_spec = extract_methods(st.paper_text, st.sections, log_dir=out_dir)
-    # Saved as artifacts/method_spec.json by the extractor
-    print("Methods extracted -> method_spec.json")
+    # Step J: Complete the spec extracted in step B (dataset-stats & CIFAR-10 defaults, no LLM call)
+    _step("J. Complete method spec")
+    method_spec = _step_fn("complete_method_spec")(st.method_spec, log_dir=out_dir, dataset_stats=full_stats)
+    if full_stats:  # image dataset: the scaffold trains on the downloaded folder (path relative to code/)
+        method_spec["data"] = {"root": os.path.relpath(ds_dir, out_dir / "code"), "layout": full_stats["layout"]}
+    st.method_spec = method_spec
+    # Saved as artifacts/method_spec.json
+    print("Methods completed -> method_spec.json")
 
     # Step K: Code scaffold (Jinja2 templates)
     _step("K. Render code scaffold")
-    code_paths = render_code_templates(method_spec, templates_dir=None, out_dir=out_dir)
-    print("Code scaffold generated under artifacts/code/")
+    code_paths, render_report = _step_fn("render_code_templates")(method_spec, templates_dir=None, out_dir=out_dir)
+    st.code_scaffold = code_paths
+    updated = [k for k, v in render_report.items() if v == "updated"]
+    print(f"Code scaffold generated under artifacts/code/ ({len(updated)} updated, "
+          f"{len(render_report) - len(updated)} unchanged)")
+    for rel in updated:
+        print(f"  updated: {rel}")
 
     # Step L: Paper -> Code Wiki
     _step("L. Compose paper->code wiki")
-    compose_wiki(method_spec, code_paths, out_dir / "paper_to_code_wiki.md")
+    _step_fn("compose_wiki")(method_spec, code_paths, out_dir / "paper_to_code_wiki.md")
     print("Wiki written -> artifacts/paper_to_code_wiki.md")
 
     return st
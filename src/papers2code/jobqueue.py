@@ -0,0 +1,306 @@
+import contextlib
+import hashlib
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY,
+    paper         TEXT NOT NULL UNIQUE,
+    out_dir       TEXT NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'queued',  -- queued | leased | done | failed
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_token   TEXT,
+    lease_expires REAL,
+    enqueued_at   REAL NOT NULL,
+    finished_at   REAL,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, lease_expires);
+CREATE TABLE IF NOT EXISTS stages (
+    job_id      INTEGER NOT NULL REFERENCES jobs (id),
+    lease_token TEXT NOT NULL,
+    attempt     INTEGER NOT NULL,
+    stage       TEXT NOT NULL,
+    worker      TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    PRIMARY KEY (job_id, lease_token, stage)
+);
+"""
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired and may already belong to another worker"""
+
+
+@dataclass(frozen=True)
+class Lease:
+    job_id: int
+    paper: str
+    out_dir: str
+    token: str
+    attempt: int
+    owner: str
+
+
+def out_dir_for(paper: str, out_root: Path) -> Path:
+    """Stable per-paper output directory: <stem>-<hash of the full source>"""
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", Path(paper.rstrip("/")).stem)[:60] or "paper"
+    return out_root / f"{stem}-{hashlib.sha1(paper.encode('utf-8')).hexdigest()[:8]}"
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue:
+    """
+    Durable paper queue in one SQLite file shared by every worker. Jobs are claimed
+    with time-limited leases (one UPDATE ... RETURNING, so two workers never claim the
+    same row), kept alive by heartbeats and fenced by a per-claim token: a worker whose
+    lease expired cannot record stages or complete the job. Expired leases return the
+    job to the queue, up to MAX_ATTEMPTS claims
+
+    wal=True suits workers on one host; over a network filesystem (NFS, SMB) SQLite's
+    WAL shared memory is unavailable, so use wal=False (rollback journal + file locks)
+    """
+
+    def __init__(self, path: Path, wal: bool = True, max_attempts: int = MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.wal = wal
+        self.max_attempts = max_attempts
+        self._local = threading.local()  # sqlite3 connections are per thread
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA journal_mode={'WAL' if self.wal else 'DELETE'}")
+            conn.execute("PRAGMA synchronous=NORMAL" if self.wal else "PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def _tx(self):
+        """Write transaction taking the lock up front (no deadlocking read->write upgrades)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, papers: List[str], out_root: Path) -> int:
+        """Add papers not queued before (a paper source is only ever processed once); returns the count added"""
+        now = time.time()
+        with self._tx() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (paper, out_dir, enqueued_at) VALUES (?, ?, ?)",
+                [(p, str(out_dir_for(p, out_root)), now) for p in papers],
+            )
+            return conn.total_changes - before
+
+    def claim(self, owner: str, lease_seconds: float) -> Lease | None:
+        now = time.time()
+        token = os.urandom(8).hex()
+        with self._tx() as conn:
+            # leases that expired on their last allowed attempt fail instead of retrying forever
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ?, lease_token = NULL, "
+                "error = 'lease expired ' || attempts || ' time(s) (worker killed or stalled)' "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_token = ?, lease_expires = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' "
+                "            OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1) "
+                "RETURNING id, paper, out_dir, attempts",
+                (owner, token, now + lease_seconds, now),
+            ).fetchone()
+        if row is None:
+            return None
+        return Lease(row["id"], row["paper"], row["out_dir"], token, row["attempts"], owner)
+
+    def _owned(self, conn: sqlite3.Connection, lease: Lease) -> bool:
+        row = conn.execute(
+            "SELECT 1 FROM jobs WHERE id = ? AND status = 'leased' AND lease_token = ? AND lease_expires >= ?",
+            (lease.job_id, lease.token, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def heartbeat(self, lease: Lease, lease_seconds: float) -> bool:
+        """Extend the lease; False once it was lost (expired or re-claimed)"""
+        with self._tx() as conn:
+            if not self._owned(conn, lease):
+                return False
+            conn.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (time.time() + lease_seconds, lease.job_id))
+            return True
+
+    def stage(self, lease: Lease, stage: str) -> None:
+        """Record a stage start (closing the previous stage of this lease); raises LeaseLost"""
+        now = time.time()
+        with self._tx() as conn:
+            if not self._owned(conn, lease):
+                raise LeaseLost(f"job {lease.job_id}: lease lost before stage '{stage}'")
+            self._close_stages(conn, lease, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (job_id, lease_token, attempt, stage, worker, started_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (lease.job_id, lease.token, lease.attempt, stage, lease.owner, now),
+            )
+
+    @staticmethod
+    def _close_stages(conn: sqlite3.Connection, lease: Lease, now: float) -> None:
+        conn.execute(
+            "UPDATE stages SET finished_at = ? WHERE job_id = ? AND lease_token = ? AND finished_at IS NULL",
+            (now, lease.job_id, lease.token),
+        )
+
+    def complete(self, lease: Lease) -> bool:
+        """Mark done if the lease is still held; False means another worker owns the job now"""
+        now = time.time()
+        with self._tx() as conn:
+            if not self._owned(conn, lease):
+                return False
+            self._close_stages(conn, lease, now)
+            conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, lease_token = NULL, error = NULL WHERE id = ?",
+                (now, lease.job_id),
+            )
+            return True
+
+    def fail(self, lease: Lease, error: str) -> None:
+        """Pipeline error: back to the queue while attempts remain, else failed"""
+        with self._tx() as conn:
+            if not self._owned(conn, lease):
+                return
+            retry = lease.attempt < self.max_attempts
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_token = NULL, lease_expires = NULL, "
+                "finished_at = ? WHERE id = ?",
+                ("queued" if retry else "failed", error[:2000], None if retry else time.time(), lease.job_id),
+            )
+
+    def release(self, lease: Lease) -> None:
+        """Graceful shutdown: hand the job back without spending an attempt"""
+        with self._tx() as conn:
+            if self._owned(conn, lease):
+                conn.execute(
+                    "UPDATE jobs SET status = 'queued', attempts = attempts - 1, lease_token = NULL, "
+                    "lease_expires = NULL WHERE id = ?",
+                    (lease.job_id,),
+                )
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT id, paper, out_dir, status, attempts, lease_owner, error FROM jobs ORDER BY id"
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+class _Heartbeat(threading.Thread):
+    def __init__(self, queue_path: Path, wal: bool, lease: Lease, lease_seconds: float):
+        super().__init__(name="p2c-heartbeat", daemon=True)
+        self.queue = JobQueue(queue_path, wal=wal)
+        self.lease = lease
+        self.lease_seconds = lease_seconds
+        self.lost = threading.Event()
+        self._halt = threading.Event()
+
+    def run(self) -> None:
+        while not self._halt.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.lease, self.lease_seconds):
+                    self.lost.set()
+                    return
+            except sqlite3.OperationalError:
+                pass  # busy database: retry on the next beat, the lease has slack
+
+    def stop(self) -> None:
+        self._halt.set()
+        self.join()
+
+
+def work(
+    queue_path: Path,
+    lease_seconds: float = 120.0,
+    wal: bool = True,
+    max_jobs: int | None = None,
+    exit_when_idle: bool = False,
+    poll_seconds: float = 2.0,
+) -> int:
+    """
+    Worker loop: claim a job, run the pipeline into its out_dir while a heartbeat
+    thread keeps the lease alive, record each stage, then complete (or fail/retry)
+    Stage boundaries double as fencing points: a worker whose lease was lost stops at
+    the next stage instead of racing the new owner. Returns the number of jobs completed
+    """
+    from papers2code.graph import run_pipeline
+
+    queue = JobQueue(queue_path, wal=wal)
+    owner = worker_id()
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        lease = queue.claim(owner, lease_seconds)
+        if lease is None:
+            counts = queue.counts()
+            if exit_when_idle and not counts.get("queued") and not counts.get("leased"):
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"[{owner}] job {lease.job_id} (attempt {lease.attempt}): {lease.paper}")
+        beat = _Heartbeat(queue_path, wal, lease, lease_seconds)
+        beat.start()
+
+        def on_stage(title: str) -> None:
+            if beat.lost.is_set():
+                raise LeaseLost(f"job {lease.job_id}: lease lost before stage '{title}'")
+            queue.stage(lease, title)
+
+        out = Path(lease.out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        try:
+            with (out / "run.log").open("a", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+                run_pipeline(paper_source=lease.paper, out_dir=out, on_stage=on_stage)
+        except LeaseLost as e:
+            print(f"[{owner}] {e}; leaving it to the new owner")
+        except KeyboardInterrupt:
+            queue.release(lease)
+            raise
+        except Exception as e:
+            queue.fail(lease, f"{type(e).__name__}: {e}")
+            print(f"[{owner}] job {lease.job_id} failed: {type(e).__name__}: {e}")
+        else:
+            if queue.complete(lease):
+                done += 1
+                print(f"[{owner}] job {lease.job_id} done -> {out}")
+            else:
+                print(f"[{owner}] job {lease.job_id}: lease lost before completion; result discarded")
+        finally:
+            beat.stop()
+    return done
@@ -1,36 +1,143 @@
 import json
 import os
+import re
+import time
+from functools import cache
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
-from openai import OpenAI
+from pydantic import BaseModel
+
+from papers2code.config import settings
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 MODEL_NAME = os.getenv("P2C_MODEL", "gpt-4o-mini")
+# Cheaper/faster model for small or easy calls (same as P2C_MODEL unless set)
+FAST_MODEL_NAME = os.getenv("P2C_MODEL_FAST", MODEL_NAME)
+CHARS_PER_TOKEN = 4  # estimate when no tokenizer is available
+# Room for the instructions wrapped around a paper excerpt of llm_chunk_tokens
+PROMPT_OVERHEAD_TOKENS = 3_000
 _client = None
 
-def client() -> OpenAI:
+
+class ModelProfile(BaseModel):
+    """Per-call-site model settings; token budgets apply to the prompt and the completion"""
+    model: str = MODEL_NAME
+    max_input_tokens: int
+    max_output_tokens: int
+    temperature: float = 1.0
+    timeout: float = 120.0
+    fast_below_tokens: int = 0  # inputs up to this size route to FAST_MODEL_NAME
+    fast_always: bool = False  # easy task: always route to FAST_MODEL_NAME
+
+
+def _profile(name: str, **defaults: Any) -> ModelProfile:
+    """Defaults overridable per call site, e.g. P2C_MODEL_PAPER, P2C_MAX_OUTPUT_TOKENS_PAPER"""
+    key = name.upper()
+    if os.getenv(f"P2C_MODEL_{key}"):
+        defaults["model"] = os.environ[f"P2C_MODEL_{key}"]
+    for field in ("max_input_tokens", "max_output_tokens", "timeout"):
+        value = os.getenv(f"P2C_{field.upper()}_{key}")
+        if value:
+            defaults[field] = float(value) if field == "timeout" else int(value)
+    return ModelProfile(**defaults)
+
+
+# Call sites are the log_name prefixes ("paper_chunk03" -> "paper_chunk")
+PROFILES: Dict[str, ModelProfile] = {
+    # paper_extractor sends the whole paper in one call only when it fits llm_chunk_tokens
+    "paper": _profile("paper", max_input_tokens=settings.llm_chunk_tokens + PROMPT_OVERHEAD_TOKENS,
+                      max_output_tokens=6_000, timeout=180.0),
+    "paper_chunk": _profile("paper_chunk", max_input_tokens=settings.llm_chunk_tokens + PROMPT_OVERHEAD_TOKENS,
+                            max_output_tokens=4_000, fast_below_tokens=4_000),
+    "paper_repair": _profile("paper_repair", max_input_tokens=4_000, max_output_tokens=1_500,
+                             timeout=60.0, fast_always=True),
+}
+DEFAULT_PROFILE = _profile("default", max_input_tokens=28_000, max_output_tokens=4_000)
+
+
+def client() -> "OpenAI":
     global _client
     if _client is None:
+        from openai import OpenAI
         _client = OpenAI()
     return _client
 
 
+@cache
+def _encoder(model: str) -> Tuple[str, Callable[[str], List[int]] | None, Callable[[List[int]], str] | None]:
+    """(tokenizer name, encode, decode); tiktoken when installed and its BPE files load, else an estimate"""
+    try:
+        import tiktoken
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("o200k_base")
+        return enc.name, enc.encode, enc.decode
+    except Exception:  # not installed, or offline without cached BPE files
+        return "chars/4", None, None
+
+
+def count_tokens(text: str, model: str = MODEL_NAME) -> int:
+    _, encode, _ = _encoder(model)
+    return len(encode(text)) if encode else -(-len(text) // CHARS_PER_TOKEN)
+
+
+def trim_to_tokens(text: str, max_tokens: int, model: str = MODEL_NAME) -> str:
+    """Keep the first max_tokens tokens (instructions come first, the excerpt last)"""
+    _, encode, decode = _encoder(model)
+    if encode:
+        ids = encode(text)
+        return text if len(ids) <= max_tokens else decode(ids[:max_tokens])
+    return text[: max_tokens * CHARS_PER_TOKEN]
+
+
+def route(log_name: str, input_tokens: int) -> Tuple[str, ModelProfile, str, str]:
+    """Pick (call site, profile, model, rule) for a call"""
+    site = re.sub(r"\d+$", "", log_name)
+    profile = PROFILES.get(site, DEFAULT_PROFILE)
+    if FAST_MODEL_NAME == profile.model and (profile.fast_always or input_tokens <= profile.fast_below_tokens):
+        return site, profile, profile.model, "default model (no fast model configured)"
+    if profile.fast_always:
+        return site, profile, FAST_MODEL_NAME, "easy task -> fast model"
+    if input_tokens <= profile.fast_below_tokens:
+        return site, profile, FAST_MODEL_NAME, f"input <= {profile.fast_below_tokens} tokens -> fast model"
+    return site, profile, profile.model, "default model"
+
+
 def chat_json(prompt: str,
               system: str = "You are a precise extraction assistant.",
               log_dir: Optional[Path] = None,
-              log_name: str = "mentions") -> Dict[str, Any]:
+              log_name: str = "default") -> Dict[str, Any]:
     """
     Call the model, prefer JSON, but robustly parse raw content if needed
+    The call site (log_name) selects a ModelProfile; the prompt is trimmed to its input
+    budget and small/easy calls are routed to the fast model. The route is logged
     """
+    system_tokens = count_tokens(system)
+    input_tokens = system_tokens + count_tokens(prompt)
+    site, profile, model, rule = route(log_name, input_tokens)
+    trimmed = 0
+    if input_tokens > profile.max_input_tokens:
+        prompt = trim_to_tokens(prompt, max(0, profile.max_input_tokens - system_tokens), model)
+        trimmed = input_tokens - profile.max_input_tokens
+        input_tokens = system_tokens + count_tokens(prompt, model)
+
+    t0 = time.perf_counter()
     resp = client().chat.completions.create(
-        model=MODEL_NAME,
+        model=model,
         messages=[{"role":"system","content":system},
                   {"role":"user","content":prompt}],
 
         response_format={"type":"json_object"},
-        temperature=1,
+        temperature=profile.temperature,
+        max_completion_tokens=profile.max_output_tokens,
+        timeout=profile.timeout,
     )
+    latency = time.perf_counter() - t0
     msg = resp.choices[0].message
     raw = getattr(msg, "content", None) or ""
 
@@ -40,8 +147,27 @@ def chat_json(prompt: str,
         data = {}
 
     if log_dir:
+        usage = getattr(resp, "usage", None)
+        route_log = {
+            "call_site": site,
+            "model": model,
+            "rule": rule,
+            "tokenizer": _encoder(model)[0],
+            "input_tokens": input_tokens,
+            "trimmed_tokens": trimmed,
+            "max_input_tokens": profile.max_input_tokens,
+            "max_output_tokens": profile.max_output_tokens,
+            "temperature": profile.temperature,
+            "timeout": profile.timeout,
+            "latency_seconds": round(latency, 3),
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                "completion_tokens": getattr(usage, "completion_tokens", None),
+            },
+        }
         (log_dir / "logs").mkdir(parents=True, exist_ok=True)
         (log_dir / "logs" / f"{log_name}_prompt.txt").write_text(prompt, encoding="utf-8")
+        (log_dir / "logs" / f"{log_name}_route.json").write_text(json.dumps(route_log, indent=2), encoding="utf-8")
         (log_dir / "logs" / f"{log_name}_response.raw.json").write_text(raw, encoding="utf-8")
         (log_dir / "logs" / f"{log_name}_response.parsed.json").write_text(
             json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8"
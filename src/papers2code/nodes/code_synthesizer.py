@@ -1,9 +1,18 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
-from jinja2 import Environment, FileSystemLoader, StrictUndefined, select_autoescape
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    StrictUndefined,
+    select_autoescape,
+)
+
+from papers2code.config import settings
+from papers2code.tools.artifacts import write_text_if_changed
 
 
 try:
@@ -41,47 +50,96 @@ def _resolve_templates_dir() -> Path:
     return p
 
 
+# Process-wide environments, one per templates dir. Each keeps its compiled
+# templates in memory (re-checked against the source mtime on every lookup) and
+# shares an on-disk bytecode cache whose entries are keyed by the source hash
+_ENVS: Dict[Path, Environment] = {}
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache | None:
+    try:
+        settings.template_cache_dir.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None  # read-only home etc: in-memory cache only
+    return FileSystemBytecodeCache(str(settings.template_cache_dir))
+
+
 def _env(templates_dir: Path) -> Environment:
-    return Environment(
-        loader=FileSystemLoader(str(templates_dir)),
-        autoescape=select_autoescape(disabled_extensions=("py","yml","md","ipynb","txt")),
-        undefined=StrictUndefined,
-        trim_blocks=True,
-        lstrip_blocks=True,
-    )
+    key = templates_dir.resolve()
+    env = _ENVS.get(key)
+    if env is None:
+        env = Environment(
+            loader=FileSystemLoader(str(key)),
+            autoescape=select_autoescape(disabled_extensions=("py","yml","md","ipynb","txt")),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=True,
+            cache_size=-1,
+            bytecode_cache=_bytecode_cache(),
+        )
+        _ENVS[key] = env
+    return env
+
 
+# config.yaml sections that are not extracted from the paper. The pipeline points
+# data.root at the downloaded dataset_<slug> folder, relative to code/
+SCAFFOLD_DEFAULTS = {
+    "data": {"root": "../data", "layout": "cifar_batches", "cache_dir": "data_cache", "val_fraction": 0.1},
+    "loader": {"num_workers": "auto", "persistent_workers": True, "prefetch_factor": 2, "pin_memory": "auto"},
+    "perf": {"threads": 0, "channels_last": True, "compile": False},
+    "bench": {"batches": 50, "warmup": 5},
+}
 
-def render_code_templates(spec: Dict[str, Any], templates_dir: Path | None, out_dir: Path) -> Dict[str, str]:
+
+TEMPLATE_OUTPUTS = {
+    "dataset.py.j2": "code/src/dataset.py",
+    "preprocess.py.j2": "code/src/preprocess.py",
+    "model.py.j2": "code/src/model.py",
+    "train.py.j2": "code/src/train.py",
+    "runtime.py.j2": "code/src/runtime.py",
+    "bench.py.j2": "code/src/bench.py",
+    "environment.yml.j2": "code/environment.yml",
+    "eda_notebook.ipynb.j2": "code/notebooks/EDA.ipynb",
+    "dataset_card.md.j2": "code/DATASET_CARD_TEMPLATE.md",
+    "config.yaml.j2": "code/config.yaml",
+    "README.md.j2": "code/README.md",
+    "Makefile.j2": "code/Makefile",
+}
+
+
+def warm_templates(templates_dir: Path | None = None) -> int:
+    """Compile every scaffold template into the process-wide environment; returns the count"""
+    env = _env(templates_dir or _resolve_templates_dir())
+    for tmpl in TEMPLATE_OUTPUTS:
+        env.get_template(tmpl)
+    return len(TEMPLATE_OUTPUTS)
+
+
+def render_code_templates(
+    spec: Dict[str, Any], templates_dir: Path | None, out_dir: Path
+) -> Tuple[Dict[str, str], Dict[str, str]]:
     """
     Renders code files from templates using the extracted spec
-    Returns a dict of {relative_path: absolute_path}
+    Only files whose rendered content changed are written
+    Returns ({relative_path: absolute_path}, {relative_path: "updated" | "unchanged"})
     """
     if templates_dir is None:
         templates_dir = _resolve_templates_dir()
 
     env = _env(templates_dir)
+    spec = {**spec, **{k: {**v, **(spec.get(k) or {})} for k, v in SCAFFOLD_DEFAULTS.items()}}
     outputs = {}
-
-    mapping = {
-        "preprocess.py.j2": "code/src/preprocess.py",
-        "model.py.j2": "code/src/model.py",
-        "train.py.j2": "code/src/train.py",
-        "environment.yml.j2": "code/environment.yml",
-        "eda_notebook.ipynb.j2": "code/notebooks/EDA.ipynb",
-        "dataset_card.md.j2": "code/DATASET_CARD_TEMPLATE.md",
-        "config.yaml.j2": "code/config.yaml",
-        "README.md.j2": "code/README.md",
-    }
-    mapping["Makefile.j2"] = "code/Makefile"
+    report = {}
 
     out_dir.mkdir(parents=True, exist_ok=True)
-    for tmpl, rel_out in mapping.items():
+    for tmpl, rel_out in TEMPLATE_OUTPUTS.items():
         tpl = env.get_template(tmpl)  # will raise TemplateNotFound with clear path
         rendered = tpl.render(**spec)
         path = out_dir / rel_out
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(rendered, encoding="utf-8")
+        changed = write_text_if_changed(path, rendered)
         outputs[rel_out] = str(path)
+        report[rel_out] = "updated" if changed else "unchanged"
 
-    (out_dir / "method_spec.json").write_text(json.dumps(spec, indent=2), encoding="utf-8")
-    return outputs
+    write_text_if_changed(out_dir / "method_spec.json", json.dumps(spec, indent=2))
+    return outputs, report
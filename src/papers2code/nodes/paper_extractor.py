@@ -0,0 +1,391 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Annotated, Any, Dict, Iterator, List, Tuple, get_args, get_origin
+import json
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from papers2code.config import settings
+from papers2code.llm.openai_client import chat_json, count_tokens
+from papers2code.nodes.dataset_mention_extractor import MENTION_RULES, dedupe_mentions, scrape_kaggle_urls
+from papers2code.nodes.methods_extractor import METHODS_FIELDS, SCHEMA, _paper_value
+from papers2code.state import DatasetMention, MethodSpec
+
+
+REPAIR_CONTEXT_CHARS = 6_000
+MAX_CITATIONS = 10
+
+# Paper phrasing per spec leaf, used to pick the few paragraphs a repair call needs
+FIELD_HINTS = {
+    "name": ["dataset"],
+    "num_classes": ["classes"],
+    "input_size": ["resolution", "pixels", "image size", "32x32", "224"],
+    "mean": ["normaliz", "mean"],
+    "std": ["normaliz", "standard deviation"],
+    "random_crop": ["crop"],
+    "padding": ["pad"],
+    "random_flip": ["flip"],
+    "cutout": ["cutout"],
+    "family": ["architecture", "network"],
+    "depth": ["depth", "layers"],
+    "widen_factor": ["widen", "width"],
+    "dropout": ["dropout"],
+    "epochs": ["epoch"],
+    "batch_size": ["batch size", "mini-batch", "minibatch"],
+    "optimizer": ["sgd", "adam", "optimiz"],
+    "lr": ["learning rate"],
+    "momentum": ["momentum"],
+    "weight_decay": ["weight decay", "l2"],
+    "scheduler": ["learning rate", "schedule", "decay", "cosine"],
+    "citations": ["experiment", "implementation"],
+}
+
+
+def _field_path(loc: Tuple[Any, ...]) -> Tuple[str, ...]:
+    """Validation error location -> spec field path (list indices collapse to the list field)"""
+    path: List[str] = []
+    for part in loc:
+        if isinstance(part, int):
+            break
+        path.append(str(part))
+    return tuple(path)
+
+
+def _set(data: Dict[str, Any], path: Tuple[str, ...], value: Any) -> None:
+    for k in path[:-1]:
+        if not isinstance(data.get(k), dict):
+            data[k] = {}
+        data = data[k]
+    data[path[-1]] = value
+
+
+def _validate_spec(raw: Any) -> Dict[Tuple[str, ...], str]:
+    """
+    {field path: error message} for every field of raw that fails MethodSpec validation
+    Missing fields are not failures: complete_method_spec fills them from defaults
+    """
+    try:
+        MethodSpec.model_validate(raw)
+        return {}
+    except ValidationError as e:
+        failing: Dict[Tuple[str, ...], str] = {}
+        for err in e.errors():
+            if err["type"] != "missing":
+                failing.setdefault(_field_path(err["loc"]), err["msg"])
+        return failing
+
+
+_INVALID = object()
+
+
+def _typed_value(value: Any, annotation: Any, metadata: List[Any]) -> Any:
+    """
+    value as the field type parses it, or _INVALID. A list of models keeps its valid
+    items (e.g. a citation without a quote, which validation reports as "missing")
+    """
+    adapter = TypeAdapter(Annotated[(annotation, *metadata)] if metadata else annotation)
+    try:
+        return adapter.dump_python(adapter.validate_python(value), mode="json")
+    except ValidationError:
+        pass
+    item = (get_args(annotation) or [None])[0]
+    if get_origin(annotation) is list and isinstance(item, type) and issubclass(item, BaseModel) and isinstance(value, list):
+        items = (_typed_value(v, item, []) for v in value)
+        return [v for v in items if v is not _INVALID]
+    return _INVALID
+
+
+def _typed_spec(raw: Dict[str, Any], model: type[BaseModel] = MethodSpec) -> Dict[str, Any]:
+    """
+    The values of a (possibly partial) valid spec as the models parse them ("false" ->
+    False, "4" -> 4), so templates never see the LLM's raw strings. Missing and null
+    fields stay out / null, as do fields that still do not parse; keys outside the
+    models are dropped
+    """
+    typed: Dict[str, Any] = {}
+    for name, info in model.model_fields.items():
+        if name not in raw:
+            continue
+        value = raw[name]
+        sub = info.annotation
+        if value is None:
+            typed[name] = None
+        elif isinstance(sub, type) and issubclass(sub, BaseModel) and isinstance(value, dict):
+            typed[name] = _typed_spec(value, sub)
+        else:
+            value = _typed_value(value, sub, info.metadata)
+            if value is not _INVALID:
+                typed[name] = value
+    return typed
+
+
+def _repair_context(paper_text: str, paths: List[Tuple[str, ...]]) -> str:
+    keywords = {kw for p in paths for kw in FIELD_HINTS.get(p[-1] if p else "", [p[-1].replace("_", " ")] if p else [])}
+    picked: List[str] = []
+    size = 0
+    for para in paper_text.split("\n\n"):
+        low = para.lower()
+        if any(kw in low for kw in keywords):
+            if size + len(para) > REPAIR_CONTEXT_CHARS:
+                break
+            picked.append(para)
+            size += len(para)
+    return "\n\n".join(picked)
+
+
+def _repair(
+    raw: Dict[str, Any],
+    failing: Dict[Tuple[str, ...], str],
+    paper_text: str,
+    log_dir: Path,
+) -> Dict[str, Any]:
+    """One small LLM call re-extracting only the failing fields; returns the patched spec"""
+    lines = [
+        f"- {'.'.join(p) or '(root)'}: {msg} (got {json.dumps(_paper_value(raw, *p), ensure_ascii=False)[:200]})"
+        for p, msg in failing.items()
+    ]
+    prompt = (
+        "Some fields of a method spec extracted from a research paper failed validation.\n"
+        "Return a strict JSON object containing ONLY these fields, nested as in the spec "
+        "(e.g. {\"train\": {\"lr\": 0.1}}), with corrected values:\n"
+        + "\n".join(lines) + "\n\n"
+        "Field meanings:\n" + METHODS_FIELDS +
+        f"\nRelevant paper paragraphs:\n{_repair_context(paper_text, list(failing))}"
+    )
+    fixed = chat_json(prompt, log_dir=log_dir, log_name="paper_repair")
+    patched = json.loads(json.dumps(raw))  # deep copy
+    for path in failing:
+        value = _paper_value(fixed, *path) if path else fixed
+        if path and value is not None:
+            _set(patched, path, value)
+    return patched
+
+
+def _pack(pieces: List[Tuple[str, int]], max_tokens: int) -> List[str]:
+    chunks: List[str] = []
+    cur: List[str] = []
+    size = 0
+    for piece, tokens in pieces:
+        if cur and size + tokens + 1 > max_tokens:  # + the "\n\n" separator
+            chunks.append("\n\n".join(cur))
+            cur, size = [], 0
+        cur.append(piece)
+        size += tokens + 1
+    if cur:
+        chunks.append("\n\n".join(cur))
+    return chunks
+
+
+def _cut(para: str, max_tokens: int) -> List[Tuple[str, int]]:
+    """(piece, tokens) of at most max_tokens each, cut at offsets scaled by the paragraph's token density"""
+    tokens = count_tokens(para)
+    if tokens <= max_tokens:
+        return [(para, tokens)]
+    step = max(1, len(para) * max_tokens // tokens)
+    pieces: List[Tuple[str, int]] = []
+    start = 0
+    while start < len(para):
+        piece = para[start:start + step]
+        n = count_tokens(piece)
+        while n > max_tokens and len(piece) > 1:  # denser than average here: shrink
+            piece = piece[:max(1, len(piece) * max_tokens // n)]
+            n = count_tokens(piece)
+        pieces.append((piece, n))
+        start += len(piece)
+    return pieces
+
+
+def split_chunks(paper_text: str, titles: List[str], max_tokens: int) -> List[str]:
+    """
+    Split the paper on section boundaries (paragraphs matching a section title) into
+    chunks of at most max_tokens (count_tokens). Whole sections are packed together;
+    a section over the budget is split on paragraphs, and a paragraph over it is cut
+    """
+    title_set = {t.strip() for t in titles if t.strip()}
+    sections: List[List[str]] = []
+    for para in paper_text.split("\n\n"):
+        if not sections or para.strip() in title_set:
+            sections.append([])
+        sections[-1].append(para)
+
+    pieces: List[Tuple[str, int]] = []
+    for sec in sections:
+        text = "\n\n".join(sec)
+        tokens = count_tokens(text)
+        if tokens <= max_tokens:
+            pieces.append((text, tokens))
+            continue
+        for para in sec:
+            pieces += _cut(para, max_tokens)
+    return _pack(pieces, max_tokens)
+
+
+def _extraction_prompt(text: str, partial: bool) -> str:
+    scope = (
+        "This is ONE PART of a longer paper: return null for any method_spec field this part "
+        "does not state (do not infer defaults), and cite only quotes from this part.\n"
+        if partial else ""
+    )
+    return (
+        "You read a research paper excerpt. In ONE strict JSON object, return both the concrete "
+        "dataset references and an implementation plan for the Methods section:\n"
+        "{\"candidates\": [...], \"method_spec\": {...}}\n\n"
+        "candidates: array of {name: str|null, url_if_any: str|null, context_snippet: str, confidence: float}\n"
+        "Rules:\n" + MENTION_RULES + "\n"
+        "method_spec: object with keys " + json.dumps(list(SCHEMA.keys())) + "\n"
+        "Add 5-10 concise citations as {section, quote}. "
+        "Prefer Implementation/Experiments sections; include config-like snippets.\n"
+        "Where:\n" + METHODS_FIELDS + scope +
+        f"\nPaper excerpt:\n{text}"
+    )
+
+
+def _valid_mentions(data: Dict[str, Any]) -> Tuple[List[Dict], int]:
+    """Validated candidates of one response (items without a name or url are rejected)"""
+    mentions: List[Dict] = []
+    rejected = 0
+    for item in data.get("candidates") or []:
+        try:
+            mention = DatasetMention.model_validate(item)
+        except ValidationError:
+            rejected += 1
+            continue
+        if mention.name or mention.url_if_any:
+            mentions.append(mention.model_dump())
+        else:
+            rejected += 1
+    return mentions, rejected
+
+
+def _leaves(spec: Any, schema: Dict[str, Any] = SCHEMA, prefix: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """(path, value) of every non-empty spec field, following SCHEMA (citations excluded)"""
+    if not isinstance(spec, dict):
+        return
+    for k, sub in schema.items():
+        v = spec.get(k)
+        if k == "citations" or v is None or v == "" or v == []:
+            continue
+        if isinstance(sub, dict) and isinstance(v, dict):
+            yield from _leaves(v, sub, prefix + (k,))
+        elif not isinstance(sub, dict):
+            yield prefix + (k,), v
+
+
+def _citation_support(path: Tuple[str, ...], value: Any, citations: List[Any], chunk: str) -> int:
+    """
+    How strongly a chunk's citations back a value: each citation quoting the value or
+    the field's wording counts 1, or 2 when the quote is found verbatim in the chunk
+    """
+    needle = str(value).lower() if isinstance(value, (int, float, str)) and not isinstance(value, bool) else None
+    keywords = FIELD_HINTS.get(path[-1], [path[-1].replace("_", " ")])
+    text = chunk.lower()
+    score = 0
+    for c in citations:
+        quote = str(c.get("quote") or "").lower().strip() if isinstance(c, dict) else ""
+        if quote and ((needle and needle in quote) or any(kw in quote for kw in keywords)):
+            score += 2 if quote in text else 1
+    return score
+
+
+def _merge_specs(chunks: List[str], specs: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Deterministic merge of per-chunk method specs: for each field the value with the
+    strongest citation support wins, ties going to the earliest chunk. Citations are
+    unioned in chunk order. Returns (merged spec, {field: competing values} for conflicts)
+    """
+    candidates: Dict[Tuple[str, ...], List[Tuple[int, int, Any]]] = {}
+    citations: List[Dict[str, Any]] = []
+    seen_quotes = set()
+    for i, (chunk, spec) in enumerate(zip(chunks, specs)):
+        cites = [c for c in spec.get("citations") or [] if isinstance(c, dict)]
+        for path, value in _leaves(spec):
+            candidates.setdefault(path, []).append((_citation_support(path, value, cites, chunk), i, value))
+        for c in cites:
+            key = str(c.get("quote") or "").strip().lower()
+            if key and key not in seen_quotes:
+                seen_quotes.add(key)
+                citations.append(c)
+
+    merged: Dict[str, Any] = {}
+    conflicts: Dict[str, Any] = {}
+    for path, options in candidates.items():
+        support, _, value = max(options, key=lambda o: (o[0], -o[1]))
+        _set(merged, path, value)
+        if len({json.dumps(v, sort_keys=True) for _, _, v in options}) > 1:
+            conflicts[".".join(path)] = {
+                "chosen": value,
+                "options": [{"chunk": i, "value": v, "support": s} for s, i, v in options],
+            }
+    merged["citations"] = citations[:MAX_CITATIONS]
+    return merged, conflicts
+
+
+def extract_paper(
+    paper_text: str,
+    log_dir: Path,
+    sections: Dict[str, Any] | None = None,
+) -> Tuple[List[Dict], Dict[str, Any]]:
+    """
+    Single structured-extraction pass: dataset mentions and the method spec, validated
+    against the state models. Papers over the llm_chunk_tokens budget are split on
+    section boundaries and the chunks (appendices included) are extracted concurrently
+    (llm_workers), then merged deterministically. Only fields that fail validation go
+    through one targeted repair call; fields still invalid after it are dropped so
+    complete_method_spec falls back to defaults for them
+    Returns (candidates, partial method spec with values typed by the state models)
+    """
+    # measured with the same tokenizer as the call budgets: a paper sent in one call is never trimmed
+    max_tokens = settings.llm_chunk_tokens
+    chunks = [paper_text]
+    if count_tokens(paper_text) > max_tokens:
+        chunks = split_chunks(paper_text, (sections or {}).get("titles") or [], max_tokens)
+    if len(chunks) <= 1:
+        chunks = [paper_text]
+        results = [chat_json(_extraction_prompt(paper_text, partial=False), log_dir=log_dir, log_name="paper")]
+    else:
+        def run(i: int) -> Dict[str, Any]:
+            prompt = _extraction_prompt(chunks[i], partial=True)
+            return chat_json(prompt, log_dir=log_dir, log_name=f"paper_chunk{i:02d}")
+
+        # latency ~ slowest chunk; map keeps chunk order so the merge is deterministic
+        with ThreadPoolExecutor(max_workers=max(1, min(settings.llm_workers, len(chunks)))) as pool:
+            results = list(pool.map(run, range(len(chunks))))
+    results = [r if isinstance(r, dict) else {} for r in results]
+
+    # Mentions: deterministic links first, then valid LLM items in chunk order
+    mentions: List[Dict] = []
+    rejected = 0
+    for data in results:
+        items, bad = _valid_mentions(data)
+        mentions += items
+        rejected += bad
+    candidates = scrape_kaggle_urls(paper_text) + dedupe_mentions(mentions)
+
+    specs = [r.get("method_spec") if isinstance(r.get("method_spec"), dict) else {} for r in results]
+    conflicts: Dict[str, Any] = {}
+    if len(specs) == 1:
+        raw = specs[0]
+    else:
+        raw, conflicts = _merge_specs(chunks, specs)
+
+    # Method spec: validate, repair failing fields once, drop what is still invalid
+    failing = _validate_spec(raw)
+    report: Dict[str, Any] = {
+        "chunks": len(chunks),
+        "rejected_candidates": rejected,
+        "conflicts": conflicts,
+        "invalid_fields": [".".join(p) for p in failing],
+    }
+    if failing:
+        raw = _repair(raw, failing, paper_text, log_dir)
+        still = _validate_spec(raw)
+        for path in still:
+            if path and _paper_value(raw, *path) is not None:
+                _set(raw, path, None)
+        report["dropped_fields"] = [".".join(p) for p in still]
+
+    (log_dir / "logs").mkdir(parents=True, exist_ok=True)
+    (log_dir / "logs" / "paper_validation.json").write_text(
+        json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8"
+    )
+    return candidates, _typed_spec(raw)
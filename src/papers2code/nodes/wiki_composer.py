@@ -21,6 +21,7 @@ def compose_wiki(spec: Dict[str, Any], code_paths: Dict[str, str], out_path: Pat
         f"- Name: {ds.get('name')}",
         f"- Num classes: {ds.get('num_classes')}",
         f"- Input size (C,H,W): {ds.get('input_size')}",
+        *([f"- Data: {spec['data'].get('root')} ({spec['data'].get('layout')}) via code/src/dataset.py"] if spec.get("data") else []),
         f"- Optimizer: {ds.get('optimizer')}  lr={ds.get('lr')} momentum={ds.get('momentum')} weight_decay={ds.get('weight_decay')}",
         f"- Scheduler: {_fmt_sched(ds.get('scheduler'))}  epochs={ds.get('epochs')}  batch_size={ds.get('batch_size')}",
         ""
@@ -0,0 +1,284 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+
+# ---------------------------------------------------------------- worker process side
+
+_WARM: Dict[str, str] = {}
+
+
+def _warm_pdf() -> None:
+    # text-layer pages use the fast strategy (no layout model); OCR runs as a tesseract subprocess
+    import pdf2image  # noqa: F401
+    import pypdf  # noqa: F401
+    import pytesseract  # noqa: F401
+    import unstructured.partition.pdf  # noqa: F401
+
+
+def _warm_openai() -> None:
+    from papers2code.llm.openai_client import client
+    client()
+
+
+def _warm_kaggle() -> None:
+    from papers2code.tools.kaggle_client import _api_client
+    _api_client()
+
+
+def _warm_steps() -> None:
+    from papers2code import graph
+    for name in graph._STEPS:
+        graph._step_fn(name)
+
+
+def _warm_templates() -> None:
+    from papers2code.nodes.code_synthesizer import warm_templates
+    warm_templates()
+
+
+def _warm_matplotlib() -> None:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: F401
+    from matplotlib.figure import Figure  # noqa: F401
+
+
+WARM_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("steps", _warm_steps),
+    ("pdf", _warm_pdf),
+    ("openai", _warm_openai),
+    ("kaggle", _warm_kaggle),
+    ("templates", _warm_templates),
+    ("matplotlib", _warm_matplotlib),
+]
+
+
+def _warm_worker() -> None:
+    """
+    Pool initializer: pay every cold start once per worker process (step modules,
+    PDF/OCR stack, authenticated OpenAI/Kaggle clients, compiled
+    templates). A failing item is recorded and retried lazily by the pipeline
+    """
+    for name, fn in WARM_STEPS:
+        t = time.perf_counter()
+        try:
+            fn()
+            _WARM[name] = f"ok ({time.perf_counter() - t:.2f}s)"
+        except Exception as e:
+            _WARM[name] = f"failed: {type(e).__name__}: {e}"
+
+
+def _worker_info() -> Dict[str, Any]:
+    return {"pid": os.getpid(), "warm": dict(_WARM)}
+
+
+def _run_job(paper: str, out_dir: str, use_memo: bool) -> Dict[str, Any]:
+    from papers2code.graph import run_pipeline
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    t = time.perf_counter()
+    with (out / "run.log").open("w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        st = run_pipeline(paper_source=paper, out_dir=out, use_memo=use_memo)
+    return {"pid": os.getpid(), "seconds": round(time.perf_counter() - t, 3), "issues": st.issues}
+
+
+# ---------------------------------------------------------------- service side
+
+@dataclass
+class Job:
+    id: str
+    paper: str
+    out_dir: str
+    use_memo: bool = True
+    status: str = "queued"  # queued | running | done | failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    worker_pid: int | None = None
+    issues: List[str] = field(default_factory=list)
+    error: str | None = None
+
+
+class PipelineService:
+    """
+    Runs paper jobs on a pool of pre-warmed worker processes. Jobs are queued in
+    memory and dispatched only when a worker is free, so "running" is accurate and
+    queue wait is measurable. Each job writes to its own out_dir (run.log holds the
+    pipeline console output)
+    """
+
+    def __init__(self, out_root: Path, workers: int = 2):
+        self.out_root = out_root
+        self.workers = workers
+        self.started_at = time.time()
+        self.jobs: Dict[str, Job] = {}
+        self.warm: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[str | None]" = queue.Queue()
+        self._free = threading.Semaphore(workers)
+        self._pool: ProcessPoolExecutor | None = None
+        self._dispatcher = threading.Thread(target=self._dispatch, name="p2c-dispatch", daemon=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: workers never inherit the server's threads or locks
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+        )
+
+    def _start_pool(self) -> None:
+        """(Re)create the pool, start every worker and wait until all are warm"""
+        pool = self._new_pool()
+        pings = [pool.submit(_worker_info) for _ in range(self.workers)]
+        infos = {info["pid"]: info for info in (p.result() for p in pings)}
+        self._pool, self.warm = pool, list(infos.values())
+
+    def start(self) -> None:
+        """Start every worker and wait until all are warm"""
+        self._start_pool()
+        self._dispatcher.start()
+
+    def submit(self, paper: str, out_dir: str | None = None, use_memo: bool = True) -> Job:
+        job_id = uuid.uuid4().hex[:12]
+        job = Job(id=job_id, paper=paper, out_dir=str(Path(out_dir) if out_dir else self.out_root / job_id),
+                  use_memo=use_memo)
+        with self._lock:
+            self.jobs[job_id] = job
+        self._queue.put(job_id)
+        return job
+
+    def _dispatch(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            self._free.acquire()
+            with self._lock:
+                job = self.jobs[job_id]
+                job.status, job.started_at = "running", time.time()
+            try:
+                fut = self._pool.submit(_run_job, job.paper, job.out_dir, job.use_memo)
+            except BrokenProcessPool:  # a worker died (OOM, segfault): replace and re-warm the pool
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._start_pool()
+                fut = self._pool.submit(_run_job, job.paper, job.out_dir, job.use_memo)
+            fut.add_done_callback(lambda f, job=job: self._finish(job, f))
+
+    def _finish(self, job: Job, fut: Future) -> None:
+        with self._lock:
+            job.finished_at = time.time()
+            try:
+                result = fut.result()
+                job.status, job.worker_pid, job.issues = "done", result["pid"], result["issues"]
+            except Exception as e:
+                job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+        self._free.release()
+
+    def job_info(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            info = asdict(job)
+        out = Path(info["out_dir"])
+        if info["status"] == "done" and out.is_dir():
+            info["artifacts"] = sorted(p.name for p in out.iterdir())
+        return info
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        counts = {s: sum(j.status == s for j in jobs) for s in ("queued", "running", "done", "failed")}
+        runs = sorted(j.finished_at - j.started_at for j in jobs if j.finished_at and j.started_at)
+        waits = sorted(j.started_at - j.submitted_at for j in jobs if j.started_at)
+
+        def pct(xs: List[float], q: float) -> float | None:
+            return round(xs[min(len(xs) - 1, int(q * len(xs)))], 3) if xs else None
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "workers": self.workers,
+            "jobs": counts,
+            "run_seconds": {"p50": pct(runs, 0.5), "p95": pct(runs, 0.95), "max": runs[-1] if runs else None},
+            "queue_wait_seconds": {"p50": pct(waits, 0.5), "p95": pct(waits, 0.95)},
+            "warm": self.warm,
+        }
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _handler(service: PipelineService) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, payload: Any) -> None:
+            body = json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            path = self.path.rstrip("/")
+            if path == "/metrics":
+                return self._send(200, service.metrics())
+            if path == "/jobs":
+                with service._lock:
+                    ids = list(service.jobs)
+                return self._send(200, [service.job_info(i) for i in ids])
+            if path.startswith("/jobs/"):
+                info = service.job_info(path.split("/", 2)[2])
+                return self._send(200, info) if info else self._send(404, {"error": "unknown job"})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            if self.path.rstrip("/") != "/jobs":
+                return self._send(404, {"error": "not found"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                paper = body["paper"]
+            except (ValueError, KeyError, TypeError):
+                return self._send(400, {"error": "expected JSON body {\"paper\": <path or URL>}"})
+            job = service.submit(paper, out_dir=body.get("out_dir"), use_memo=body.get("use_memo", True))
+            self._send(202, {"id": job.id, "status": job.status, "out_dir": job.out_dir})
+
+        def log_message(self, fmt: str, *args: Any) -> None:  # keep the console for job events
+            pass
+
+    return Handler
+
+
+def serve(host: str, port: int, out_root: Path, workers: int) -> None:
+    """
+    HTTP API:
+      POST /jobs {"paper": ..., "out_dir"?: ..., "use_memo"?: bool} -> 202 {id, status, out_dir}
+      GET  /jobs, GET /jobs/<id> (status, timings, issues, artifacts), GET /metrics
+    """
+    service = PipelineService(out_root, workers=workers)
+    print(f"Warming {workers} worker(s)...")
+    service.start()
+    for info in service.warm:
+        print(f"  worker {info['pid']}: " + ", ".join(f"{k} {v}" for k, v in info["warm"].items()))
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    print(f"Serving on http://{host}:{server.server_address[1]} (artifacts under {out_root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
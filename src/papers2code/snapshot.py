@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import time
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from papers2code.state import PipelineState
+
+
+FORMAT = "p2c-state-v1"
+MANIFEST = "manifest.json"
+TEXT_FILE = "paper_text.txt"
+# Small fields, kept inline in the manifest
+INLINE_FIELDS = (
+    "dataset_candidates", "kaggle_choice", "sample_dir", "dataset_profile",
+    "method_spec", "code_scaffold", "wiki_md", "issues",
+)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read_manifest(snap_dir: Path) -> Dict[str, Any] | None:
+    try:
+        manifest = json.loads((snap_dir / MANIFEST).read_bytes())
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == FORMAT else None
+
+
+def _source_stamp(paper_source: str) -> List[int] | None:
+    """[size, mtime_ns] of a local paper file (None for URLs), to notice an edited PDF"""
+    try:
+        stat = os.stat(paper_source)
+    except (OSError, ValueError):
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def save_snapshot(st: PipelineState, snap_dir: Path, stage: str | None = None) -> Path:
+    """
+    Persist st as a snapshot directory: the paper text in its own file (rewritten only
+    when its hash changes, so per-stage saves cost only the manifest), section spans
+    as offsets into it, and every other field inline in manifest.json. Both files are
+    replaced atomically, so a crash leaves the previous snapshot readable
+    """
+    snap_dir.mkdir(parents=True, exist_ok=True)
+    data = st.paper_text.encode("utf-8")
+    sha1 = hashlib.sha1(data).hexdigest()
+    previous = _read_manifest(snap_dir) or {}
+    if previous.get("paper_text", {}).get("sha1") != sha1 or not (snap_dir / TEXT_FILE).is_file():
+        _atomic_write(snap_dir / TEXT_FILE, data)
+
+    fields = st.model_dump(mode="json", include=set(INLINE_FIELDS))
+    manifest = {
+        "format": FORMAT,
+        "stage": stage,
+        "saved_at": time.time(),
+        "paper_source": st.paper_source,
+        "source_stamp": _source_stamp(st.paper_source),
+        "paper_text": {"file": TEXT_FILE, "bytes": len(data), "sha1": sha1},
+        "sections": {k: [list(span) for span in v] for k, v in st.sections.items()},
+        "fields": fields,
+    }
+    _atomic_write(snap_dir / MANIFEST, json.dumps(manifest, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    return snap_dir
+
+
+class Snapshot:
+    """
+    Read side of a snapshot: the manifest (small fields, section spans) is parsed on
+    open; the paper text is read on first access only, so stages that need just the
+    spec or candidates never load it
+    """
+
+    def __init__(self, snap_dir: Path, manifest: Dict[str, Any]):
+        self.snap_dir = snap_dir
+        self.manifest = manifest
+        self.stage: str | None = manifest.get("stage")
+        self.paper_source: str = manifest["paper_source"]
+        self.fields: Dict[str, Any] = manifest.get("fields") or {}
+
+    @property
+    def sections(self) -> Dict[str, List[Tuple[int, int]]]:
+        return {k: [tuple(span) for span in v] for k, v in (self.manifest.get("sections") or {}).items()}
+
+    @property
+    def has_text(self) -> bool:
+        return self.manifest.get("paper_text", {}).get("bytes", 0) > 0
+
+    def matches(self, paper_source: str) -> bool:
+        """Text was extracted from this source, unchanged since (local files are re-stat'ed)"""
+        return (self.has_text and self.paper_source == paper_source
+                and self.manifest.get("source_stamp") == _source_stamp(paper_source))
+
+    @cached_property
+    def paper_text(self) -> str:
+        return (self.snap_dir / self.manifest["paper_text"]["file"]).read_text(encoding="utf-8")
+
+    def section_texts(self, kind: str) -> List[str]:
+        return [self.paper_text[a:b] for a, b in self.sections.get(kind, [])]
+
+    def state(self, with_text: bool = True) -> PipelineState:
+        """Materialize a PipelineState (with_text=False skips reading the paper text)"""
+        return PipelineState(
+            paper_source=self.paper_source,
+            paper_text=self.paper_text if with_text else "",
+            sections=self.sections if with_text else {},
+            **self.fields,
+        )
+
+
+def open_snapshot(snap_dir: Path) -> Snapshot | None:
+    manifest = _read_manifest(snap_dir)
+    return Snapshot(snap_dir, manifest) if manifest else None
@@ -1,5 +1,5 @@
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Union
+from pydantic import BaseModel, Field
 
 class KaggleMeta(BaseModel):
     slug: Optional[str] = None
@@ -9,10 +9,84 @@ class KaggleMeta(BaseModel):
     size_mb: Optional[float] = None
     files: List[Dict[str, Any]] = []
 
+# Structured-extraction models: PipelineState.dataset_candidates items and the
+# method spec (validated LLM output); methods_extractor.SCHEMA is derived from MethodSpec
+
+class DatasetMention(BaseModel):
+    name: Optional[str] = None
+    url_if_any: Optional[str] = None
+    context_snippet: str = ""
+    confidence: float = 0.0
+
+class DatasetSpec(BaseModel):
+    name: str
+    num_classes: int
+    input_size: Annotated[List[int], Field(min_length=3, max_length=3)]
+
+class NormalizeSpec(BaseModel):
+    # null when the paper omits them (filled from dataset statistics)
+    mean: Optional[Annotated[List[float], Field(min_length=1, max_length=4)]] = None
+    std: Optional[Annotated[List[float], Field(min_length=1, max_length=4)]] = None
+
+class AugmentSpec(BaseModel):
+    random_crop: bool
+    padding: int
+    random_flip: bool
+    cutout: bool
+
+class PreprocessSpec(BaseModel):
+    normalize: NormalizeSpec = NormalizeSpec()
+    augment: AugmentSpec
+
+class ModelSpec(BaseModel):
+    family: str
+    depth: int
+    widen_factor: int
+    dropout: float
+
+class TrainSpec(BaseModel):
+    epochs: int
+    batch_size: int
+    optimizer: str
+    lr: float
+    momentum: float
+    weight_decay: float
+    scheduler: Union[str, Dict[str, Any]]  # "cosine" or {type, steps, drop_factor}
+
+class Citation(BaseModel):
+    section: str
+    quote: str
+
+class MethodSpec(BaseModel):
+    dataset: DatasetSpec
+    preprocess: PreprocessSpec
+    model: ModelSpec
+    train: TrainSpec
+    citations: List[Citation] = []
+
+def section_spans(text: str, sections: Dict[str, List[str]]) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    {kind: [section strings]} -> {kind: [(start, end) offsets into text]}, so sections
+    never duplicate the paper text. Strings are located in order (they were joined
+    into text in reading order); one that cannot be found is skipped
+    """
+    spans: Dict[str, List[Tuple[int, int]]] = {}
+    for kind, parts in sections.items():
+        cursor = 0
+        spans[kind] = []
+        for part in parts:
+            start = text.find(part, cursor)
+            if start < 0:
+                continue
+            cursor = start + len(part)
+            spans[kind].append((start, cursor))
+    return spans
+
 class PipelineState(BaseModel):
     paper_source: str
     paper_text: str = ""
-    sections: Dict[str, str] = {}
+    # (start, end) character offsets into paper_text per kind ("titles", "narrative")
+    sections: Dict[str, List[Tuple[int, int]]] = {}
     dataset_candidates: List[Dict[str, Any]] = []
     kaggle_choice: Optional[KaggleMeta] = None
     sample_dir: Optional[str] = None
@@ -21,3 +95,6 @@ class PipelineState(BaseModel):
     code_scaffold: Dict[str, str] = {}
     wiki_md: str = ""
     issues: List[str] = []
+
+    def section_texts(self, kind: str) -> List[str]:
+        return [self.paper_text[a:b] for a, b in self.sections.get(kind, [])]
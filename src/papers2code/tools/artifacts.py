@@ -1,5 +1,24 @@
+import hashlib
 from pathlib import Path
 
 def write_text(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(content, encoding="utf-8")
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_text_if_changed(path: Path, content: str) -> bool:
+    """
+    Write only when the content hash differs from what is on disk, so mtimes of
+    untouched files survive (make, editors and file watchers are not invalidated)
+    Returns True when the file was (re)written
+    """
+    data = content.encode("utf-8")
+    if path.is_file() and _sha256(path.read_bytes()) == _sha256(data):
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
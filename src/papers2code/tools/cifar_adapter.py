@@ -1,10 +1,15 @@
+from fnmatch import fnmatch
 from pathlib import Path
+import io
 import pickle
 from typing import Dict, List, Tuple
 
 from PIL import Image
 import numpy as np
 
+from papers2code.tools.file_index import dataset_index
+from papers2code.tools.sample_shard import open_sample_writer
+
 
 BATCH_GLOB = "data_batch_*"
 TEST_BATCH = "test_batch"
@@ -17,10 +22,10 @@ def _load_pickle(path: Path):
 
 
 def _iter_batches(dataset_dir: Path) -> List[Path]:
-    batches = sorted(dataset_dir.glob(BATCH_GLOB))
-    tb = dataset_dir / TEST_BATCH
-    if tb.exists():
-        batches.append(tb)
+    top = [e.path for e in dataset_index(dataset_dir).top_level()]
+    batches = [dataset_dir / n for n in top if fnmatch(n, BATCH_GLOB)]
+    if TEST_BATCH in top:
+        batches.append(dataset_dir / TEST_BATCH)
     return batches
 
 
@@ -49,9 +54,14 @@ def sample_cifar_batches(
     out_dir: Path,
     per_class: int = 50,
     max_total: int = 500,
+    fmt: str = "shard",
 ) -> Tuple[Path, Dict[str, int], int]:
-    sample_dir = out_dir / "images_sample"
-    sample_dir.mkdir(parents=True, exist_ok=True)
+    """
+    Decode sampled rows to PNG and write them through one sample writer
+    (a single packed shard, or the loose images_sample/<class>/ layout)
+    Returns (sample_path, per_class_counts, broken)
+    """
+    writer = open_sample_writer(out_dir, fmt)
 
     label_names = _load_label_names(dataset_dir)
     per_class_counts: Dict[str, int] = {}
@@ -96,9 +106,9 @@ def sample_cifar_batches(
                 continue
 
             cls = label_names[y] if (label_names and 0 <= y < len(label_names)) else f"class_{y}"
-            cls_dir = sample_dir / cls
-            cls_dir.mkdir(parents=True, exist_ok=True)
-            im.save(cls_dir / f"img_{cnt:05d}.png")
+            buf = io.BytesIO()
+            im.save(buf, format="PNG")
+            writer.add(cls, f"img_{cnt:05d}.png", buf.getvalue())
 
             per_idx[y] = cnt + 1
             per_class_counts[cls] = per_class_counts.get(cls, 0) + 1
@@ -107,4 +117,4 @@ def sample_cifar_batches(
         if total >= max_total:
             break
 
-    return sample_dir, per_class_counts, broken
+    return writer.close(), per_class_counts, broken
@@ -0,0 +1,155 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from papers2code.tools.cifar_adapter import _iter_batches, _load_label_names, _load_pickle
+from papers2code.tools.image_sampler import _has_cifar_batches, _scan_class_dirs
+
+
+# (count, mean[C], M2[C]) per channel, pixel values scaled to [0, 1]
+Moments = Tuple[int, np.ndarray, np.ndarray]
+
+CHUNK_ROWS = 2048  # CIFAR rows per vectorized chunk (~50 MB as float64)
+
+
+def _empty(channels: int = 3) -> Moments:
+    return 0, np.zeros(channels), np.zeros(channels)
+
+
+def _merge(a: Moments, b: Moments) -> Moments:
+    """Chan et al. parallel Welford merge: exact and numerically stable."""
+    na, ma, m2a = a
+    nb, mb, m2b = b
+    if na == 0:
+        return b
+    if nb == 0:
+        return a
+    n = na + nb
+    delta = mb - ma
+    mean = ma + delta * (nb / n)
+    m2 = m2a + m2b + delta * delta * (na * nb / n)
+    return n, mean, m2
+
+
+def _moments(pixels: np.ndarray) -> Moments:
+    """pixels: (N, C, P) uint8 -> per-channel moments over N*P values."""
+    x = pixels.astype(np.float64) / 255.0
+    n = x.shape[0] * x.shape[2]
+    mean = x.mean(axis=(0, 2))
+    m2 = ((x - mean[None, :, None]) ** 2).sum(axis=(0, 2))
+    return n, mean, m2
+
+
+def _cifar_batch_stats(batch_path: Path) -> Tuple[Moments, Dict[int, int], int]:
+    obj = _load_pickle(batch_path)
+    data = obj.get("data")
+    if data is None:
+        data = obj.get(b"data")
+    labels = None
+    for k in ("labels", b"labels", "fine_labels", b"fine_labels"):
+        labels = obj.get(k)
+        if labels is not None:
+            break
+    if data is None:
+        return _empty(), {}, 0
+
+    rows = np.asarray(data, dtype=np.uint8).reshape(-1, 3, 1024)
+    acc = _empty()
+    for start in range(0, rows.shape[0], CHUNK_ROWS):
+        acc = _merge(acc, _moments(rows[start:start + CHUNK_ROWS]))
+    counts: Dict[int, int] = {}
+    if labels is not None:
+        bins = np.bincount(np.asarray(labels, dtype=np.int64))
+        counts = {int(i): int(c) for i, c in enumerate(bins) if c}
+    return acc, counts, int(rows.shape[0])
+
+
+def _image_stats(path: Path) -> Tuple[Moments, Tuple[int, int]] | None:
+    try:
+        with Image.open(path) as im:
+            arr = np.asarray(im.convert("RGB"), dtype=np.uint8)
+    except Exception:
+        return None
+    h, w = arr.shape[:2]
+    return _moments(arr.reshape(1, h * w, 3).transpose(0, 2, 1)), (w, h)
+
+
+def _cifar_stats(dataset_dir: Path, workers: int | None) -> Dict[str, Any]:
+    batches = _iter_batches(dataset_dir)
+    label_names = _load_label_names(dataset_dir) or []
+    acc = _empty()
+    class_counts: Counter = Counter()
+    n_images = 0
+    # one pickle per process: unpickling holds the GIL, the reductions are vectorized
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for moments, counts, n in pool.map(_cifar_batch_stats, batches):
+            acc = _merge(acc, moments)
+            n_images += n
+            for y, c in counts.items():
+                name = label_names[y] if 0 <= y < len(label_names) else f"class_{y}"
+                class_counts[name] += c
+    size_hist = {"32x32": n_images} if n_images else {}
+    return _summary(acc, n_images, size_hist, dict(class_counts))
+
+
+def _folder_stats(dataset_dir: Path, workers: int | None) -> Dict[str, Any]:
+    classes = _scan_class_dirs(dataset_dir)
+    jobs: List[Tuple[str, Path]] = []
+    seen = set()
+    # split dirs are scanned before the root fallback, so the first key is the real class
+    for key, paths in classes.items():
+        for p in paths:
+            if p not in seen:
+                seen.add(p)
+                jobs.append((key.split("/")[-1], p))
+    acc = _empty()
+    size_hist: Counter = Counter()
+    class_counts: Counter = Counter()
+    n_images = 0
+    # PIL decoding and numpy reductions release the GIL, threads are enough here
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results: Iterable = pool.map(_image_stats, (p for _, p in jobs))
+        for (cls, _), res in zip(jobs, results):
+            if res is None:
+                continue
+            moments, (w, h) = res
+            acc = _merge(acc, moments)
+            size_hist[f"{w}x{h}"] += 1
+            class_counts[cls] += 1
+            n_images += 1
+    return _summary(acc, n_images, dict(size_hist), dict(class_counts))
+
+
+def _summary(acc: Moments, n_images: int, size_hist: Dict[str, int], class_counts: Dict[str, int]) -> Dict[str, Any]:
+    n, mean, m2 = acc
+    std = np.sqrt(m2 / n) if n else np.zeros_like(mean)
+    input_size = None
+    if size_hist:
+        w, h = (int(v) for v in max(size_hist.items(), key=lambda kv: kv[1])[0].split("x"))
+        input_size = [3, h, w]
+    return {
+        "total_images": n_images,
+        "mean": [round(float(v), 4) for v in mean] if n else None,
+        "std": [round(float(v), 4) for v in std] if n else None,
+        "size_hist": dict(sorted(size_hist.items(), key=lambda kv: -kv[1])),
+        "class_counts": dict(sorted(class_counts.items())),
+        "num_classes": len(class_counts),
+        "input_size": input_size,
+    }
+
+
+def compute_dataset_stats(dataset_dir: Path, workers: int | None = None) -> Dict[str, Any]:
+    """
+    Streaming statistics over the full downloaded dataset (not just the sample):
+    per-channel mean/std in [0, 1] (parallel Welford merge), image size histogram
+    and class counts, plus the layout ("cifar_batches" | "class_folders"). CIFAR
+    batch files are processed one per worker process in vectorized chunks;
+    class-folder images are decoded in a thread pool
+    """
+    if _has_cifar_batches(dataset_dir):
+        return {**_cifar_stats(dataset_dir, workers), "layout": "cifar_batches"}
+    return {**_folder_stats(dataset_dir, workers), "layout": "class_folders"}
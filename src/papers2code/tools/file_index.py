@@ -0,0 +1,152 @@
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+FORMAT = "p2c-file-index-v1"
+INDEX_SUFFIX = ".files.json"
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+TRAIN_DIRS = ("train", "training", "Train")
+TEST_DIRS = ("test", "val", "validation", "Test", "Val")
+SPLIT_DIRS = TRAIN_DIRS + TEST_DIRS
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    path: str  # relative to the index root, "/"-separated
+    size: int
+    mtime_ns: int
+    ext: str  # lower-case, with the dot ("" when none)
+    split: str | None  # top-level split folder (train/, val/ ...) when the file is under one
+    cls: str | None  # class folder: <split>/<cls>/... or <cls>/...
+
+
+def _entry(path: str, size: int, mtime_ns: int) -> FileEntry:
+    parts = path.split("/")
+    split = cls = None
+    if parts[0] in SPLIT_DIRS:
+        split = parts[0]
+        cls = parts[1] if len(parts) >= 3 else None
+    elif len(parts) >= 2:
+        cls = parts[0]
+    return FileEntry(path, size, mtime_ns, os.path.splitext(parts[-1])[1].lower(), split, cls)
+
+
+class FileIndex:
+    """Every file under root (resolved) with its stat data, from one scandir pass"""
+
+    def __init__(self, root: Path, dirs: Dict[str, Dict[str, Any]], scanned: int = 0, reused: int = 0):
+        self.root = root
+        self.dirs = dirs
+        self.scanned = scanned  # directories listed by the last refresh
+        self.reused = reused  # directories whose mtime was unchanged (listing reused)
+        self.entries: List[FileEntry] = sorted(
+            (_entry(f"{rel}/{name}" if rel else name, size, mtime_ns)
+             for rel, node in dirs.items() for name, size, mtime_ns in node["files"]),
+            key=lambda e: e.path,
+        )
+
+    def files(self, exts: Iterable[str] | None = None) -> List[FileEntry]:
+        if exts is None:
+            return list(self.entries)
+        wanted = tuple(exts)
+        return [e for e in self.entries if e.path.lower().endswith(wanted)]
+
+    def top_level(self) -> List[FileEntry]:
+        return [e for e in self.entries if "/" not in e.path]
+
+    def has_cifar_batches(self) -> bool:
+        return any(e.path.startswith("data_batch_") or e.path == "test_batch" for e in self.top_level())
+
+    def class_dirs(self, exts: Tuple[str, ...] = IMAGE_EXTS) -> Dict[str, List[Path]]:
+        """
+        {"<split>/<class>" or "<class>": image paths}: classes under split folders first
+        (train-like, then test-like), then class folders directly under root
+        """
+        grouped: Dict[Tuple[str | None, str], List[Path]] = {}
+        for e in self.files(exts):
+            if e.cls is not None:
+                grouped.setdefault((e.split, e.cls), []).append(self.root / e.path)
+        order = {name: i for i, name in enumerate(SPLIT_DIRS)}
+        keys = sorted(grouped, key=lambda k: (order.get(k[0], len(order)), k[1]))
+        return {(f"{split}/{cls}" if split else cls): grouped[(split, cls)] for split, cls in keys}
+
+    def listing(self) -> List[Dict[str, Any]]:
+        """Kaggle-style file listing ({name, size}), as consumed by guess_modality"""
+        return [{"name": e.path, "size": e.size} for e in self.entries]
+
+
+def index_path_for(root: Path) -> Path:
+    """The index lives next to the folder (never inside it, so it is not indexed itself)"""
+    return root.with_name(root.name + INDEX_SUFFIX)
+
+
+def _load(root: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        data = json.loads(index_path_for(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return (data.get("dirs") or {}) if data.get("format") == FORMAT else {}
+
+
+def _scan(root: Path, old: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, Dict[str, Any]], int, int]:
+    """
+    Walk root; a directory whose mtime is unchanged keeps its previous listing (adding,
+    removing or renaming an entry bumps the directory mtime), so a refresh costs one
+    stat per directory plus a scandir of the directories that changed
+    """
+    dirs: Dict[str, Dict[str, Any]] = {}
+    scanned = reused = 0
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        try:
+            mtime_ns = os.stat(root / rel).st_mtime_ns
+        except OSError:
+            continue
+        node = old.get(rel)
+        if node is not None and node["mtime_ns"] == mtime_ns:
+            reused += 1
+        else:
+            files, subdirs = [], []
+            with os.scandir(root / rel) as it:
+                for d in it:
+                    if d.is_dir(follow_symlinks=False):
+                        subdirs.append(d.name)
+                    elif d.is_file():
+                        st = d.stat()
+                        files.append([d.name, st.st_size, st.st_mtime_ns])
+            node = {"mtime_ns": mtime_ns, "files": sorted(files), "subdirs": sorted(subdirs)}
+            scanned += 1
+        dirs[rel] = node
+        stack += [f"{rel}/{name}" if rel else name for name in node["subdirs"]]
+    return dirs, scanned, reused
+
+
+# Process-wide: every stage of a run shares the index built after the download
+_INDEXES: Dict[Path, FileIndex] = {}
+
+
+def dataset_index(root: Path, refresh: bool = False, persist: bool = True) -> FileIndex:
+    """
+    File index of root, shared by modality detection, sampling and profiling
+    The first call in a process (or refresh=True) loads <root>.files.json and refreshes
+    it incrementally; later calls return the in-memory index without touching the disk
+    A file rewritten in place (same name, so its directory mtime is unchanged) keeps
+    its old size/mtime in the index; delete <root>.files.json to rebuild from scratch
+    """
+    key = Path(root).resolve()
+    if not refresh and key in _INDEXES:
+        return _INDEXES[key]
+    old = _load(key) if persist else {}
+    dirs, scanned, reused = _scan(key, old)
+    if persist and (scanned or dirs.keys() != old.keys()):
+        path = index_path_for(key)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"format": FORMAT, "root": str(key), "dirs": dirs}, separators=(",", ":")),
+                       encoding="utf-8")
+        os.replace(tmp, path)  # concurrent runs over one dataset never read a torn index
+    _INDEXES[key] = index = FileIndex(key, dirs, scanned=scanned, reused=reused)
+    return index
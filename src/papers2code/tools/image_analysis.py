@@ -0,0 +1,195 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from papers2code.tools.sample_shard import SampleEntry, iter_samples
+
+
+HASH_SIZE = 8  # 64-bit perceptual hash, same bits as imagehash.phash
+HASH_PX = HASH_SIZE * 4  # DCT input size
+TILE = 96  # grayscale analysis tile for brightness/contrast/blur (fixed scale across images)
+CHUNK = 256  # images decoded per batch; metrics are vectorized per batch
+BLURRY_BELOW = 100.0  # Laplacian variance under which an image is reported as likely blurry
+
+_METRICS = [
+    ("ok", "?"),  # decoded successfully (other metrics are 0 when False)
+    ("width", "<i4"),
+    ("height", "<i4"),
+    ("aspect", "<f4"),  # width / height
+    ("brightness", "<f4"),  # mean luma, 0-255
+    ("contrast", "<f4"),  # luma standard deviation
+    ("blur", "<f4"),  # variance of the Laplacian (low = blurry)
+    ("phash", "<u8"),
+    ("thumb", "<i4"),  # row in ImageAnalysis.thumbs, -1 when no thumbnail was requested
+]
+METRICS_DTYPE = np.dtype(_METRICS)
+
+
+def analysis_dtype(cls_len: int, name_len: int) -> np.dtype:
+    """Table dtype with cls/name as wide as the longest in the sample (never truncated)"""
+    return np.dtype([("cls", f"U{max(1, cls_len)}"), ("name", f"U{max(1, name_len)}")] + _METRICS)
+
+# DCT-II basis (unnormalized, as scipy.fftpack.dct): D = C @ X @ C.T
+_n = np.arange(HASH_PX)
+_DCT = 2.0 * np.cos(np.pi * _n[:, None] * (2 * _n[None, :] + 1) / (2 * HASH_PX))
+
+
+@dataclass
+class ImageAnalysis:
+    table: np.ndarray  # analysis_dtype, one row per sampled image in sample order
+    thumbs: np.ndarray  # (K, cell, cell, 3) uint8 tiles, indexed by table["thumb"]
+
+    def thumbnail(self, cls: str, name: str) -> np.ndarray | None:
+        rows = np.flatnonzero((self.table["cls"] == cls) & (self.table["name"] == name))
+        if not len(rows) or self.table["thumb"][rows[0]] < 0:
+            return None
+        return self.thumbs[self.table["thumb"][rows[0]]]
+
+    def save(self, path: Path) -> Path:
+        """Columnar .npz (table + thumbs), loadable without pickle"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, table=self.table, thumbs=self.thumbs)
+        return path
+
+
+def fit_tile(im: Image.Image, cell: int) -> np.ndarray:
+    """Fit an RGB image into a cell x cell white tile, centered"""
+    tile = np.full((cell, cell, 3), 255, dtype=np.uint8)
+    scale = cell / max(im.size)
+    size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+    # tiny images (e.g. 32x32 CIFAR) are upscaled with crisp pixels
+    resample = Image.Resampling.NEAREST if scale >= 1 else Image.Resampling.BILINEAR
+    arr = np.asarray(im.resize(size, resample))
+    h, w = arr.shape[:2]
+    y, x = (cell - h) // 2, (cell - w) // 2
+    tile[y:y + h, x:x + w] = arr
+    return tile
+
+
+def _decode(data: bytes, cell: int | None):
+    """The only decode of an image: size, hash input, analysis tile and (optional) thumbnail"""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            w, h = im.size
+            im.draft("RGB", (max(TILE, cell or 0) * 2,) * 2)  # JPEG: decode at a reduced scale
+            rgb = im.convert("RGB")
+    except Exception:
+        return None
+    gray = rgb.convert("L")
+    hash_px = np.asarray(gray.resize((HASH_PX, HASH_PX), Image.Resampling.LANCZOS), dtype=np.float64)
+    tile = np.asarray(gray.resize((TILE, TILE), Image.Resampling.BILINEAR), dtype=np.float32)
+    return w, h, hash_px, tile, fit_tile(rgb, cell) if cell else None
+
+
+def _phash(hash_px: np.ndarray) -> np.ndarray:
+    """(N, 32, 32) luma -> (N,) uint64: low-frequency DCT coefficients above their median"""
+    low = (_DCT @ hash_px @ _DCT.T)[:, :HASH_SIZE, :HASH_SIZE].reshape(len(hash_px), -1)
+    bits = low > np.median(low, axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype("<u8")
+
+
+def _quality(tiles: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(N, TILE, TILE) luma -> brightness, contrast, blur (4-neighbour Laplacian variance)"""
+    lap = (tiles[:, :-2, 1:-1] + tiles[:, 2:, 1:-1] + tiles[:, 1:-1, :-2] + tiles[:, 1:-1, 2:]
+           - 4.0 * tiles[:, 1:-1, 1:-1])
+    return tiles.mean(axis=(1, 2)), tiles.std(axis=(1, 2)), lap.var(axis=(1, 2))
+
+
+def _fill(table: np.ndarray, decoded: List[tuple]) -> None:
+    ok = [i for i, d in enumerate(decoded) if d is not None]
+    good = [d for d in decoded if d is not None]
+    if not good:
+        return
+    sizes = np.array([(d[0], d[1]) for d in good], dtype=np.int32)
+    table["ok"][ok] = True
+    table["width"][ok], table["height"][ok] = sizes[:, 0], sizes[:, 1]
+    table["aspect"][ok] = sizes[:, 0] / np.maximum(sizes[:, 1], 1)
+    table["phash"][ok] = _phash(np.stack([d[2] for d in good]))
+    brightness, contrast, blur = _quality(np.stack([d[3] for d in good]))
+    table["brightness"][ok], table["contrast"][ok], table["blur"][ok] = brightness, contrast, blur
+
+
+def analyze_images(
+    sample_path: Path,
+    thumbnails: Iterable[SampleEntry] = (),
+    cell: int = 96,
+    workers: int | None = None,
+) -> ImageAnalysis:
+    """
+    One pass over the sample (shard read sequentially) that decodes every image once in a
+    thread pool and derives perceptual hash, size/aspect, brightness/contrast, blur score
+    and, for the entries in thumbnails (e.g. the EDA grid), a cell x cell thumbnail.
+    Metrics are computed vectorized per batch of CHUNK images
+    """
+    want = {(e.cls, e.name) for e in thumbnails}
+    entries: List[SampleEntry] = []
+    tiles: List[np.ndarray] = []
+    pending: List[Tuple[bytes, bool]] = []  # (encoded image, thumbnail wanted)
+    table_parts: List[np.ndarray] = []
+
+    def flush(pool: ThreadPoolExecutor) -> None:
+        part = np.zeros(len(pending), dtype=METRICS_DTYPE)
+        part["thumb"] = -1
+        decoded = list(pool.map(lambda job: _decode(job[0], cell if job[1] else None), pending))
+        for j, ((_, thumb), d) in enumerate(zip(pending, decoded)):
+            if thumb and d is not None:
+                part["thumb"][j] = len(tiles)
+                tiles.append(d[4])
+        _fill(part, decoded)
+        table_parts.append(part)
+        pending.clear()
+
+    # PIL decoding/resizing and numpy release the GIL: threads are enough here
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for entry, data in iter_samples(sample_path):
+            pending.append((data, (entry.cls, entry.name) in want))
+            entries.append(entry)
+            if len(pending) == CHUNK:
+                flush(pool)
+        if pending:
+            flush(pool)
+
+    metrics = np.concatenate(table_parts) if table_parts else np.zeros(0, dtype=METRICS_DTYPE)
+    table = np.zeros(len(entries), dtype=analysis_dtype(max((len(e.cls) for e in entries), default=1),
+                                                        max((len(e.name) for e in entries), default=1)))
+    table["cls"] = [e.cls for e in entries]
+    table["name"] = [e.name for e in entries]
+    for key, _ in _METRICS:
+        table[key] = metrics[key]
+    thumbs = np.stack(tiles) if tiles else np.zeros((0, cell, cell, 3), dtype=np.uint8)
+    return ImageAnalysis(table, thumbs)
+
+
+def _summary(values: np.ndarray) -> Dict[str, float] | None:
+    if not len(values):
+        return None
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {"mean": round(float(values.mean()), 2), "p5": round(float(p5), 2),
+            "median": round(float(p50), 2), "p95": round(float(p95), 2)}
+
+
+def summarize(analysis: ImageAnalysis) -> Dict:
+    """Profile metrics over the analysis table (no image reads)"""
+    t = analysis.table
+    good = t[t["ok"]]
+    classes, counts = np.unique(t["cls"], return_counts=True)
+    dups = len(good) - len(np.unique(good["phash"]))
+    return {
+        "modality": "images",
+        "total_images": int(len(t)),
+        "per_class": {str(c): int(n) for c, n in zip(classes, counts)},
+        "approx_duplicate_rate": float(dups / len(t)) if len(t) else 0.0,
+        "undecodable": int(len(t) - len(good)),
+        "width": _summary(good["width"]),
+        "height": _summary(good["height"]),
+        "aspect": _summary(good["aspect"]),
+        "brightness": _summary(good["brightness"]),
+        "contrast": _summary(good["contrast"]),
+        "blur": _summary(good["blur"]),
+        "likely_blurry_rate": float((good["blur"] < BLURRY_BELOW).mean()) if len(good) else 0.0,
+    }
@@ -1,93 +1,191 @@
 from pathlib import Path
 from typing import Dict, List, Tuple
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFont
+import io
+import numpy as np
 import random
-import matplotlib.pyplot as plt
+
+from papers2code.tools.image_analysis import ImageAnalysis, fit_tile
+from papers2code.tools.sample_shard import SampleEntry, list_samples, read_samples
 
 def save_class_bar_chart(per_class: Dict[str, int], out_path: Path) -> None:
     """
     Bar chart with counts per class. Sorted by class name, value labels on bars,
     light grid, larger figure, tight layout. No explicit colors.
+    Uses an explicit Figure + Agg canvas (no pyplot global state), so it is safe
+    to call from worker threads
     """
     if not per_class:
         out_path.parent.mkdir(parents=True, exist_ok=True)
         return
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
 
     labels = sorted(per_class.keys())
     counts = [per_class[k] for k in labels]
 
-    plt.figure(figsize=(10, 5))
-    bars = plt.bar(labels, counts)
-    plt.title("Images per class (sample)")
-    plt.xlabel("Class")
-    plt.ylabel("Count")
-    plt.grid(axis="y", linestyle="--", alpha=0.4)
-    plt.xticks(rotation=30, ha="right")
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    bars = ax.bar(labels, counts)
+    ax.set_title("Images per class (sample)")
+    ax.set_xlabel("Class")
+    ax.set_ylabel("Count")
+    ax.grid(axis="y", linestyle="--", alpha=0.4)
+    ax.tick_params(axis="x", labelrotation=30)
+    for tick in ax.get_xticklabels():
+        tick.set_horizontalalignment("right")
 
     # Add value labels on top of bars
     for b, val in zip(bars, counts):
-        plt.text(b.get_x() + b.get_width() / 2, b.get_height() + max(counts) * 0.01,
-                 f"{val}", ha="center", va="bottom", fontsize=9)
+        ax.text(b.get_x() + b.get_width() / 2, b.get_height() + max(counts) * 0.01,
+                f"{val}", ha="center", va="bottom", fontsize=9)
 
-    plt.tight_layout()
+    fig.tight_layout()
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(out_path, dpi=150, bbox_inches="tight")
-    plt.close()
+    fig.savefig(out_path, dpi=150, bbox_inches="tight")
+
+
+LABEL_H = 14
+TITLE_H = 22
+PAD = 2
+
+
+def _collect_per_class(sample_path: Path) -> List[Tuple[str, List[SampleEntry]]]:
+    """Group sample entries by class (shard index or folder listing, no image reads)"""
+    grouped: Dict[str, List[SampleEntry]] = {}
+    for e in list_samples(sample_path):
+        grouped.setdefault(e.cls, []).append(e)
+    per_class: List[Tuple[str, List[SampleEntry]]] = []
+    for cls in sorted(grouped, key=str.lower):
+        imgs = sorted(grouped[cls], key=lambda e: e.name)
+        # deterministic shuffle so the grid changes little run-to-run
+        random.Random(42).shuffle(imgs)
+        per_class.append((cls, imgs))
+    return per_class
+
 
+def _round_robin(per_class: List[Tuple[str, List[SampleEntry]]], n: int) -> List[Tuple[str, SampleEntry]]:
+    """Take one image per class per round until n are picked or every class is exhausted."""
+    picked: List[Tuple[str, SampleEntry]] = []
+    depth = max((len(imgs) for _, imgs in per_class), default=0)
+    for i in range(depth):
+        for cls, imgs in per_class:
+            if i < len(imgs):
+                picked.append((cls, imgs[i]))
+                if len(picked) == n:
+                    return picked
+    return picked
 
-def save_sample_grid(sample_dir: Path, out_path: Path, grid: int = 3) -> None:
+
+def _thumbnail(data: bytes, cell: int) -> np.ndarray:
+    """Decode (JPEG draft mode when possible), fit into a cell x cell RGB tile, centered."""
+    try:
+        with Image.open(io.BytesIO(data)) as im:
+            im.draft("RGB", (cell, cell))
+            return fit_tile(im.convert("RGB"), cell)
+    except Exception:
+        return np.zeros((cell, cell, 3), dtype=np.uint8)  # unreadable: dark tile
+
+
+def render_montage(
+    cells: List[List[Tuple[str, bytes | np.ndarray] | None]],
+    cell: int = 96,
+    title: str | None = None,
+    column_labels: List[str] | None = None,
+) -> Image.Image:
     """
-    Show a grid of images with round-robin class selection so multiple classes appear.
-    Adds small titles per cell and a super-title. No explicit colors/styles.
+    Compose rows x cols thumbnails into one RGB canvas. Each cell is (label, encoded image
+    or ready cell x cell tile) or None.
+    With column_labels, a single header row is drawn instead of per-cell labels
     """
-    # Collect images per class folder
-    class_dirs = [p for p in sample_dir.iterdir() if p.is_dir()]
-    class_dirs.sort(key=lambda p: p.name.lower())
+    rows = len(cells)
+    cols = max((len(r) for r in cells), default=0)
+    label_h = 0 if column_labels else LABEL_H
+    top = (TITLE_H if title else 0) + (LABEL_H if column_labels else 0)
+    step_x, step_y = cell + PAD, cell + label_h + PAD
+    canvas = np.full((top + rows * step_y + PAD, cols * step_x + PAD, 3), 255, dtype=np.uint8)
 
-    per_class_imgs: List[List[Path]] = []
-    for c in class_dirs:
-        imgs = [p for p in c.glob("*") if p.is_file()]
-        # deterministic shuffle so the grid changes little run-to-run
-        rng = random.Random(42)
-        rng.shuffle(imgs)
-        if imgs:
-            per_class_imgs.append(imgs)
-
-    N = grid * grid
-    picked: List[Tuple[str, Path]] = []
-    # Round-robin: cycle across classes taking one at a time until we fill N or run out
-    idxs = [0] * len(per_class_imgs)
-    k = 0
-    while len(picked) < N and per_class_imgs:
-        cls_idx = k % len(per_class_imgs)
-        imgs = per_class_imgs[cls_idx]
-        i = idxs[cls_idx]
-        if i < len(imgs):
-            picked.append((class_dirs[cls_idx].name, imgs[i]))
-            idxs[cls_idx] += 1
-        k += 1
-        # break if we looped through all classes and couldn’t add more
-        if k > len(per_class_imgs) * (max(len(x) for x in per_class_imgs) if per_class_imgs else 0):
-            break
-
-    if not picked:
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        return
+    for r, row in enumerate(cells):
+        for c, item in enumerate(row):
+            if item is None:
+                continue
+            y, x = top + r * step_y + label_h, PAD + c * step_x
+            tile = item[1]
+            canvas[y:y + cell, x:x + cell] = tile if isinstance(tile, np.ndarray) else _thumbnail(tile, cell)
 
-    plt.figure(figsize=(grid * 3.2, grid * 3.2))
-    for i, (cls, path) in enumerate(picked[:N]):
-        plt.subplot(grid, grid, i + 1)
-        try:
-            with Image.open(path) as im:
-                plt.imshow(im)
-        except Exception:
-            # show empty tile if unreadable
-            plt.imshow([[0]])
-        plt.axis("off")
-        plt.title(cls[:18], fontsize=9, pad=2)
-
-    plt.suptitle("Sample images (round-robin across classes)", y=0.98, fontsize=12)
-    plt.tight_layout(rect=[0, 0, 1, 0.97])
+    img = Image.fromarray(canvas, mode="RGB")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    max_chars = max(4, cell // 6)
+    if title:
+        draw.text((PAD, 4), title, fill=(0, 0, 0), font=font)
+    if column_labels:
+        for c, name in enumerate(column_labels):
+            draw.text((PAD + c * step_x + 2, top - LABEL_H + 1), name[:max_chars], fill=(0, 0, 0), font=font)
+    else:
+        for r, row in enumerate(cells):
+            for c, item in enumerate(row):
+                if item is not None:
+                    draw.text((PAD + c * step_x + 2, top + r * step_y + 1), item[0][:max_chars],
+                              fill=(0, 0, 0), font=font)
+    return img
+
+
+Layout = List[List[Tuple[str, SampleEntry] | None]]
+
+
+def _grid_layout(sample_path: Path, grid: int, per_class_columns: bool) -> Tuple[Layout, List[str] | None]:
+    per_class = _collect_per_class(sample_path)
+    if per_class_columns:
+        per_class = per_class[:grid]
+        layout = [
+            [(cls, imgs[r]) if r < len(imgs) else None for cls, imgs in per_class]
+            for r in range(grid)
+        ]
+        return layout, [cls for cls, _ in per_class]
+    picked = _round_robin(per_class, grid * grid)
+    return [picked[i:i + grid] for i in range(0, len(picked), grid)], None
+
+
+def grid_entries(sample_path: Path, grid: int = 3, per_class_columns: bool = False) -> List[SampleEntry]:
+    """The sample entries save_sample_grid will show (thumbnails to request from analyze_images)"""
+    layout, _ = _grid_layout(sample_path, grid, per_class_columns)
+    return [item[1] for row in layout for item in row if item is not None]
+
+
+def save_sample_grid(
+    sample_path: Path,
+    out_path: Path,
+    grid: int = 3,
+    per_class_columns: bool = False,
+    cell: int = 96,
+    analysis: ImageAnalysis | None = None,
+) -> None:
+    """
+    Montage of sampled images composed directly with PIL/NumPy (no matplotlib).
+    Default: grid x grid cells with round-robin class selection and a label per cell.
+    per_class_columns: one column per class (up to grid classes), grid rows each,
+    with class names as column headers (e.g. grid=10 -> 10x10 for CIFAR-10)
+    sample_path: packed shard (only the picked entries are read) or loose sample folder
+    analysis: thumbnails already decoded by analyze_images are used as is
+    """
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    plt.savefig(out_path, dpi=150, bbox_inches="tight")
-    plt.close()
+    layout, column_labels = _grid_layout(sample_path, grid, per_class_columns)
+    if not any(layout):
+        return
+
+    tiles = {}
+    if analysis is not None and len(analysis.thumbs):
+        tiles = {e: analysis.thumbnail(e.cls, e.name) for row in layout for _, e in filter(None, row)}
+        tiles = {e: t for e, t in tiles.items() if t is not None and t.shape[0] == cell}
+    wanted = [item[1] for row in layout for item in row if item is not None and item[1] not in tiles]
+    data = {**tiles, **{e: blob for e, blob in read_samples(sample_path, wanted)}}
+    cells = [[(item[0], data[item[1]]) if item is not None else None for item in row] for row in layout]
+    if per_class_columns:
+        img = render_montage(cells, cell=cell, title="Sample images (one column per class)",
+                             column_labels=column_labels)
+    else:
+        img = render_montage(cells, cell=cell, title="Sample images (round-robin across classes)")
+
+    img.save(out_path)
@@ -1,43 +1,22 @@
 from pathlib import Path
-import shutil
 import random
 from typing import Dict, List, Tuple
 
 from PIL import Image
 
+from papers2code.config import settings
 from papers2code.tools.cifar_adapter import sample_cifar_batches
-
-
-def _is_img(p: Path) -> bool:
-    return p.suffix.lower() in {".png", ".jpg", ".jpeg"}
+from papers2code.tools.file_index import dataset_index
+from papers2code.tools.sample_shard import open_sample_writer
 
 
 def _has_cifar_batches(root: Path) -> bool:
-    return any(root.glob("data_batch_*")) or (root / "test_batch").exists()
+    return dataset_index(root).has_cifar_batches()
 
 
 def _scan_class_dirs(root: Path) -> Dict[str, List[Path]]:
-    cand_roots = []
-    for name in ("train", "training", "Train"):
-        if (root / name).exists():
-            cand_roots.append(root / name)
-    for name in ("test", "val", "validation", "Test", "Val"):
-        if (root / name).exists():
-            cand_roots.append(root / name)
-    cand_roots.append(root)  # fallback
-
-    classes: Dict[str, List[Path]] = {}
-    seen = set()
-    for base in cand_roots:
-        for cls_dir in base.iterdir() if base.exists() else []:
-            if cls_dir.is_dir():
-                images = [p for p in cls_dir.rglob("*") if p.is_file() and _is_img(p)]
-                if images:
-                    key = f"{base.name}/{cls_dir.name}" if base != root else cls_dir.name
-                    if key not in seen:
-                        classes[key] = images
-                        seen.add(key)
-    return classes
+    """{"<split>/<class>" or "<class>": image paths}, from the dataset file index"""
+    return dataset_index(root).class_dirs()
 
 
 def _integrity_ok(p: Path) -> bool:
@@ -49,9 +28,8 @@ def _integrity_ok(p: Path) -> bool:
         return False
 
 
-def _sample_from_folders(dataset_dir: Path, out_dir: Path, per_class: int, max_total: int) -> Tuple[Path, Dict[str, int], int]:
-    sample_dir = out_dir / "images_sample"
-    sample_dir.mkdir(parents=True, exist_ok=True)
+def _sample_from_folders(dataset_dir: Path, out_dir: Path, per_class: int, max_total: int, fmt: str) -> Tuple[Path, Dict[str, int], int]:
+    writer = open_sample_writer(out_dir, fmt)
     classes = _scan_class_dirs(dataset_dir)
     class_counts: Dict[str, int] = {}
     broken = 0
@@ -65,24 +43,32 @@ def _sample_from_folders(dataset_dir: Path, out_dir: Path, per_class: int, max_t
             continue
         rng.shuffle(good)
         take = min(per_class, len(good))
-        dest_cls = sample_dir / cls.replace("/", "_")
-        dest_cls.mkdir(parents=True, exist_ok=True)
+        dest_cls = cls.replace("/", "_")
         for p in good[:take]:
             if total >= max_total:
                 break
-            shutil.copy2(p, dest_cls / p.name)
+            writer.add(dest_cls, p.name, p.read_bytes())
             total += 1
         class_counts[cls] = take
         if total >= max_total:
             break
 
-    return sample_dir, class_counts, broken
+    return writer.close(), class_counts, broken
 
 
-def sample_images_auto(dataset_dir: Path, out_dir: Path, per_class: int = 50, max_total: int = 500) -> Tuple[Path, Dict[str, int], int]:
+def sample_images_auto(
+    dataset_dir: Path,
+    out_dir: Path,
+    per_class: int = 50,
+    max_total: int = 500,
+    fmt: str | None = None,
+) -> Tuple[Path, Dict[str, int], int]:
     """
     Dispatch to CIFAR decoder or folder sampler depending on dataset layout.
+    fmt: "shard" (one packed file + index) or "folders"; defaults to settings.sample_format
+    Returns (sample_path, per_class_counts, broken): the shard file or the sample folder
     """
+    fmt = fmt or settings.sample_format
     if _has_cifar_batches(dataset_dir):
-        return sample_cifar_batches(dataset_dir, out_dir, per_class=per_class, max_total=max_total)
-    return _sample_from_folders(dataset_dir, out_dir, per_class=per_class, max_total=max_total)
+        return sample_cifar_batches(dataset_dir, out_dir, per_class=per_class, max_total=max_total, fmt=fmt)
+    return _sample_from_folders(dataset_dir, out_dir, per_class=per_class, max_total=max_total, fmt=fmt)
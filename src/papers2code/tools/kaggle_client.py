@@ -1,15 +1,22 @@
-from typing import List, Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
-from kaggle.api.kaggle_api_extended import KaggleApi
+if TYPE_CHECKING:
+    from kaggle.api.kaggle_api_extended import KaggleApi
 
 
-_api: KaggleApi | None = None
+_api: "KaggleApi | None" = None
 
 
-def _api_client() -> KaggleApi:
+class DatasetUnavailable(LookupError):
+    """Kaggle answered 403/404 for a ref: deleted, renamed or made private"""
+
+
+def _api_client() -> "KaggleApi":
     global _api
     if _api is None:
+        # imported here: importing the kaggle package reads (and may demand) credentials
+        from kaggle.api.kaggle_api_extended import KaggleApi
         _api = KaggleApi()
         _api.authenticate()
     return _api
@@ -37,22 +44,44 @@ def kaggle_search_datasets(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     return results
 
 
-def kaggle_files_and_size(ref: str) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+def _http_status(e: Exception) -> int | None:
+    """HTTP status of a kaggle client error (ApiException.status or requests' HTTPError.response)"""
+    status = getattr(e, "status", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    try:
+        return int(status)
+    except (TypeError, ValueError):
+        return None
+
+
+def kaggle_list_files(ref: str) -> Tuple[List[Dict[str, Any]], float]:
     """
     Return (files, total_size_mb) without downloading
-    files = [{name, totalBytes, type}], total_size_mb is float or None
+    files = [{name, totalBytes, type}]. Raises DatasetUnavailable when Kaggle answers
+    403/404; any other failure (network, rate limit, credentials) propagates as is
     """
     api = _api_client()
     try:
         lf = api.dataset_list_files(ref)
-        files = []
-        total = 0
-        for f in getattr(lf, "files", []) or []:
-            sz = getattr(f, "totalBytes", 0) or 0
-            total += sz
-            files.append({"name": getattr(f, "name", None), "totalBytes": sz, "type": getattr(f, "type", None)})
-        mb = round(total / (1024 * 1024), 3)
-        return files, mb
+    except Exception as e:
+        status = _http_status(e)
+        if status in (403, 404):
+            raise DatasetUnavailable(f"{ref}: HTTP {status}") from e
+        raise
+    files = []
+    total = 0
+    for f in getattr(lf, "files", []) or []:
+        sz = getattr(f, "totalBytes", 0) or 0
+        total += sz
+        files.append({"name": getattr(f, "name", None), "totalBytes": sz, "type": getattr(f, "type", None)})
+    return files, round(total / (1024 * 1024), 3)
+
+
+def kaggle_files_and_size(ref: str) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+    """(files, total_size_mb) as kaggle_list_files, or ([], None) on any error"""
+    try:
+        return kaggle_list_files(ref)
     except Exception:
         return [], None
 
@@ -11,6 +11,14 @@ def guess_modality(files: List[Dict]) -> Modality:
         return "images"
     if any(n.endswith((".png", ".jpg", ".jpeg")) for n in names):
         return "images"
+
+    # NLP corpora: JSONL/NDJSON or plain-text files (READMEs/licenses aside)
+    if any(n.endswith((".jsonl", ".jsonl.gz", ".ndjson")) for n in names):
+        return "text"
+    base = [n.rsplit("/", 1)[-1] for n in names]
+    if any(n.endswith(".txt") and not n.startswith(("readme", "license")) for n in base):
+        return "text"
+
     if any("train/" in n or "test/" in n for n in names):
         return "images"
     return "unknown"
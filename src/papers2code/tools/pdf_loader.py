@@ -1,16 +1,123 @@
+import hashlib
+import json
+import re
+import tempfile
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from unstructured.partition.pdf import partition_pdf
+from typing import Any, Dict, List, Tuple
+
+from papers2code.config import settings
+
+
+KEEP = ("Title", "NarrativeText", "ListItem", "Table")
+# (page, category, text) in reading order
+Element = Tuple[int, str, str]
+
+
+def _text_pages(path: Path) -> List[int]:
+    """Letters/digits in each page's text layer (stray glyphs of scanned pages don't count)"""
+    from pypdf import PdfReader
+
+    counts = []
+    for page in PdfReader(str(path)).pages:
+        try:
+            text = page.extract_text() or ""
+        except Exception:  # broken content stream: treat as image-only
+            text = ""
+        counts.append(sum(ch.isalnum() for ch in text))
+    return counts
+
+
+def _partition_fast(path: Path) -> List[Element]:
+    """Text-layer pages: unstructured's fast strategy (no layout model, no OCR)"""
+    from unstructured.partition.pdf import partition_pdf  # heavy: pulls the unstructured stack
+
+    return [(e.metadata.page_number or 0, e.category, str(e))
+            for e in partition_pdf(filename=str(path), strategy="fast") if e.category in KEEP]
+
+
+def _ocr_elements(text: str, page: int) -> List[Element]:
+    """Tesseract output -> paragraphs; a short one without a final period is a title"""
+    elements = []
+    for para in re.split(r"\n\s*\n", text):
+        para = " ".join(para.split())
+        if not para:
+            continue
+        title = len(para) <= 80 and not para.endswith(".") and para[0].isupper()
+        elements.append((page, "Title" if title else "NarrativeText", para))
+    return elements
+
+
+def _ocr_page(path: Path, page: int) -> Tuple[List[Element], bool]:
+    """Render and OCR one page; results are cached by the hash of the rendered image"""
+    import pytesseract
+    from pdf2image import convert_from_path
+
+    image = convert_from_path(str(path), dpi=settings.ocr_dpi, first_page=page, last_page=page)[0]
+    digest = hashlib.sha1(f"{image.mode}{image.size}{settings.ocr_lang}".encode() + image.tobytes()).hexdigest()
+    cached = settings.ocr_cache_dir / f"{digest}.txt"
+    if cached.is_file():
+        return _ocr_elements(cached.read_text(encoding="utf-8"), page), True
+    text = pytesseract.image_to_string(image, lang=settings.ocr_lang)
+    try:
+        settings.ocr_cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_suffix(".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(cached)
+    except OSError:
+        pass  # read-only cache dir: OCR still succeeds
+    return _ocr_elements(text, page), False
+
+
+def _fetch(url: str) -> Path:
+    with urllib.request.urlopen(url, timeout=60) as resp, tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(resp.read())
+    return Path(f.name)
+
+
+def load_pdf_text(path_or_url: str, log_dir: Path | None = None) -> tuple[str, dict]:
+    """
+    Return concatenated text and a simple section map
+    Pages whose text layer has fewer than settings.ocr_min_chars letters/digits are
+    OCR'd (pdf2image + tesseract, settings.ocr_workers in parallel, cached by page image
+    hash); every other page is read from its text layer. Elements are merged in page
+    order. The per-page decision is logged to log_dir/logs/pdf_pages.json
+    """
+    local = Path(path_or_url)
+    path = local if local.exists() else _fetch(path_or_url)
+    try:
+        chars = _text_pages(path)
+        ocr_pages = [i + 1 for i, n in enumerate(chars) if n < settings.ocr_min_chars]
+        elements = _partition_fast(path) if len(ocr_pages) < len(chars) else []
+        skip = set(ocr_pages)
+        elements = [e for e in elements if e[0] not in skip]
+        cached: Dict[int, bool] = {}
+        if ocr_pages:
+            # rendering (pdftoppm) and tesseract run as subprocesses: threads are enough
+            with ThreadPoolExecutor(max_workers=settings.ocr_workers) as pool:
+                for page, (page_elements, hit) in zip(ocr_pages, pool.map(lambda p: _ocr_page(path, p), ocr_pages)):
+                    elements += page_elements
+                    cached[page] = hit
+    finally:
+        if path is not local:
+            path.unlink(missing_ok=True)
+    elements.sort(key=lambda e: e[0])  # stable: keeps the order within each page
 
-def load_pdf_text(path_or_url: str) -> tuple[str, dict]:
-    """Return concatenated text and a simple section map"""
-    elements = partition_pdf(filename=path_or_url) if Path(path_or_url).exists() else partition_pdf(url=path_or_url)
     text_parts, sections = [], {"titles": [], "narrative": []}
-    for e in elements:
-        et = e.category
-        if et == "Title":
-            sections["titles"].append(str(e))
-            text_parts.append(str(e))
-        elif et in ("NarrativeText","ListItem","Table"):
-            sections["narrative"].append(str(e))
-            text_parts.append(str(e))
+    for _, et, text in elements:
+        sections["titles" if et == "Title" else "narrative"].append(text)
+        text_parts.append(text)
+
+    if log_dir:
+        report: Dict[str, Any] = {
+            "pages": len(chars),
+            "ocr_pages": len(ocr_pages),
+            "ocr_cached": sum(cached.values()),
+            "min_chars": settings.ocr_min_chars,
+            "per_page": [{"page": i + 1, "text_chars": n, "ocr": i + 1 in cached, "cached": cached.get(i + 1, False)}
+                         for i, n in enumerate(chars)],
+        }
+        (log_dir / "logs").mkdir(parents=True, exist_ok=True)
+        (log_dir / "logs" / "pdf_pages.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
     return "\n\n".join(text_parts), sections
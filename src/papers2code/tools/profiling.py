@@ -0,0 +1,190 @@
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from papers2code.tools.artifacts import write_text
+
+
+PROFILE_MODES = ("cprofile", "sample")
+MAX_STACK_DEPTH = 128
+MIN_STACK_SECONDS = 1e-4  # shorter paths are too thin to see in a flamegraph
+
+
+def _slug(title: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", title).strip("_")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapsed_from_pstats(stats: pstats.Stats) -> Counter:
+    """
+    Collapsed stacks (root;...;leaf -> microseconds of self time) rebuilt from the
+    cProfile caller graph: each path's time is split between the function's self time
+    and its callees in proportion to their recorded times (exact for trees, an estimate
+    where a function is reached from several callers). Recursion is cut at the first
+    repeat, and paths under MIN_STACK_SECONDS stay in their caller's self time
+    """
+    raw = stats.stats  # func -> (cc, nc, tottime, cumtime, {caller: (cc, nc, tottime, cumtime)})
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            if caller != func:
+                callees.setdefault(caller, []).append((func, edge[3]))
+    stacks: Counter = Counter()
+
+    def label(func: tuple) -> str:
+        file, line, name = func
+        return f"{name} ({os.path.basename(file)}:{line})"
+
+    def walk(func: tuple, seconds: float, path: List[str], seen: set) -> None:
+        _, _, tottime, cumtime, _ = raw[func]
+        edges = [(g, t) for g, t in callees.get(func, []) if g in raw]
+        # under (mutual) recursion the edge times add up to more than cumtime: share, never create, time
+        total = max(cumtime, tottime + sum(t for _, t in edges))
+        scale = seconds / total if total > 0 else 0.0
+        path = path + [label(func)]
+        self_seconds = tottime * scale
+        children = [(g, t * scale) for g, t in edges]
+        if len(path) >= MAX_STACK_DEPTH:
+            self_seconds, children = seconds, []
+        for g, t in children:
+            if g in seen or t < MIN_STACK_SECONDS:
+                self_seconds += t  # recursion or negligible: kept as this frame's time
+            else:
+                walk(g, t, path, seen | {g})
+        us = int(round(self_seconds * 1e6))
+        if us > 0:
+            stacks[";".join(path)] += us
+
+    for func, (_, _, _, cumtime, callers) in raw.items():
+        if not (set(callers) - {func}):  # entered before the stage's profiler started (or a thread root)
+            walk(func, cumtime, [], {func})
+    return stacks
+
+
+def _write_collapsed(path: Path, stacks: Counter) -> None:
+    lines = [f"{stack} {count}" for stack, count in sorted(stacks.items())]
+    write_text(path, "\n".join(lines) + "\n")
+
+
+class _Sampler:
+    """
+    Low-overhead statistical profiler: a daemon thread snapshots the profiled thread's
+    stack every `interval` seconds and counts collapsed stacks (root;...;leaf)
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="p2c-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names: List[str] = []
+            while frame is not None:
+                names.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class StageProfiler:
+    """
+    Per-stage profiles of run_pipeline, written under out_dir (profiles/):
+      - mode "cprofile": deterministic, NN_<stage>.pstats per stage (snakeviz, pstats) plus
+        NN_<stage>.collapsed rebuilt from its caller graph (weights in microseconds)
+      - mode "sample": sampling, NN_<stage>.collapsed per stage (weights in samples)
+    .collapsed files feed flamegraph.pl or speedscope
+    plus summary.txt with stage wall times and the top-N hot functions (self time)
+    Only the thread running the pipeline is profiled; work in pool processes shows up
+    as time waiting on the pool
+    """
+
+    def __init__(self, out_dir: Path, mode: str = "cprofile", top: int = 25, interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (expected one of {PROFILE_MODES})")
+        self.out_dir = out_dir
+        self.mode = mode
+        self.top = top
+        self.interval = interval
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._stage: str | None = None
+        self._t_stage = 0.0
+        self._profiler: cProfile.Profile | _Sampler | None = None
+        self._walls: List[Tuple[str, float]] = []
+        self._hot: Dict[str, Counter] = {}  # stage -> function -> self seconds (or samples)
+
+    def begin(self, title: str) -> None:
+        """Close the running stage (if any) and start profiling the next one"""
+        self.end()
+        self._stage = f"{len(self._walls):02d}_{_slug(title)}"
+        self._t_stage = time.perf_counter()
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = _Sampler(threading.get_ident(), self.interval)
+            self._profiler.start()
+
+    def end(self) -> None:
+        if self._stage is None:
+            return
+        hot: Counter = Counter()
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+            path = self.out_dir / f"{self._stage}.pstats"
+            self._profiler.dump_stats(path)
+            stats = pstats.Stats(str(path))
+            for (file, line, func), (_, _, tottime, _, _) in stats.stats.items():
+                hot[f"{func} ({os.path.basename(file)}:{line})"] += tottime
+            _write_collapsed(self.out_dir / f"{self._stage}.collapsed", collapsed_from_pstats(stats))
+        else:
+            self._profiler.stop()
+            stacks = self._profiler.stacks
+            _write_collapsed(self.out_dir / f"{self._stage}.collapsed", stacks)
+            for stack, count in stacks.items():
+                hot[stack.rsplit(";", 1)[-1]] += count
+        self._walls.append((self._stage, time.perf_counter() - self._t_stage))
+        self._hot[self._stage] = hot
+        self._stage, self._profiler = None, None
+
+    def _top_lines(self, hot: Counter) -> List[str]:
+        if self.mode == "cprofile":
+            return [f"  {sec:9.3f}s  {fn}" for fn, sec in hot.most_common(self.top)]
+        total = sum(hot.values()) or 1
+        return [f"  {100 * n / total:6.1f}%  {fn}" for fn, n in hot.most_common(self.top)]
+
+    def close(self) -> Path:
+        """End the last stage and write summary.txt (stage times, per-stage and overall hot functions)"""
+        self.end()
+        unit = "self time" if self.mode == "cprofile" else "share of self samples"
+        lines = [f"Profile mode: {self.mode} | top {self.top} functions by {unit}", "", "Stage wall times:"]
+        lines += [f"  {sec:9.3f}s  {stage}" for stage, sec in self._walls]
+        overall: Counter = Counter()
+        for hot in self._hot.values():
+            overall.update(hot)
+        lines += ["", "Overall hot functions:"] + self._top_lines(overall)
+        for stage, hot in self._hot.items():
+            lines += ["", f"[{stage}]"] + self._top_lines(hot)
+        summary = self.out_dir / "summary.txt"
+        write_text(summary, "\n".join(lines) + "\n")
+        return summary
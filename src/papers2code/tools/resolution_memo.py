@@ -0,0 +1,110 @@
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from papers2code.config import settings
+
+
+MEMO_VERSION = 1
+
+
+def normalize_name(name: str) -> str:
+    """'CIFAR-10', 'cifar 10' and 'Cifar10' share one memo key"""
+    return re.sub(r"[^a-z0-9]+", "", (name or "").lower())
+
+
+def _load(path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MEMO_VERSION:
+        return {}
+    return data.get("entries") or {}
+
+
+def _save(path: Path, entries: Dict[str, Any]) -> None:
+    """Atomic write (temp file + os.replace), so concurrent runs never read a torn memo"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": MEMO_VERSION, "entries": entries}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def forget_resolution(name: str, path: Path | None = None) -> None:
+    path = path or settings.memo_path
+    entries = _load(path)
+    if entries.pop(normalize_name(name), None) is not None:
+        _save(path, entries)
+
+
+def lookup_resolution(
+    name: str,
+    list_files: Optional[Callable[[str], Tuple[List[Dict[str, Any]], Optional[float]]]] = None,
+    path: Path | None = None,
+    max_age_days: float | None = None,
+) -> Tuple[Dict[str, Any], List[str]] | None:
+    """
+    Memoized (winner, rationale) for a paper dataset name, or None on a miss
+    Entries older than max_age_days are dropped. When list_files is given (Kaggle file
+    listing), the ref must still list files; the winner's file list is refreshed from it
+    The entry is only dropped when the listing confirms the ref is gone (it raises
+    DatasetUnavailable, or lists no files); any other listing error is a plain miss
+    """
+    path = path or settings.memo_path
+    max_age_days = settings.memo_max_age_days if max_age_days is None else max_age_days
+    key = normalize_name(name)
+    entry = _load(path).get(key)
+    if not key or not entry:
+        return None
+
+    age_days = (time.time() - entry.get("resolved_at", 0)) / 86400
+    if age_days > max_age_days:
+        forget_resolution(name, path)
+        return None
+
+    winner = dict(entry["winner"])
+    if list_files:
+        from papers2code.tools.kaggle_client import DatasetUnavailable
+
+        try:
+            files, mb = list_files(winner["ref"])
+        except DatasetUnavailable:  # 403/404: deleted, renamed or made private
+            files, mb = [], None
+        except Exception as e:  # network, rate limit, credentials: keep the entry for next time
+            print(f"Memo check for '{key}' failed ({type(e).__name__}); resolving afresh")
+            return None
+        if not files:  # confirmed gone (or nothing left to download)
+            forget_resolution(name, path)
+            return None
+        winner["files"], winner["total_mb"] = files, mb
+
+    resolved = time.strftime("%Y-%m-%d", time.localtime(entry["resolved_at"]))
+    rationale = list(entry.get("rationale") or []) + [
+        f"Memo hit for '{key}' (resolved {resolved}); Kaggle search and tie-breakers skipped"
+    ]
+    return winner, rationale
+
+
+def store_resolution(name: str, winner: Dict[str, Any], rationale: List[str], path: Path | None = None) -> None:
+    path = path or settings.memo_path
+    key = normalize_name(name)
+    if not key:
+        return
+    entries = _load(path)
+    entries[key] = {
+        "name": name,
+        "winner": winner,
+        "rationale": rationale,
+        "resolved_at": time.time(),
+    }
+    _save(path, entries)
@@ -0,0 +1,133 @@
+import hashlib
+import io
+import json
+import shutil
+import tarfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from papers2code.tools.artifacts import write_text
+from papers2code.tools.file_index import dataset_index
+
+
+SAMPLE_NAME = "images_sample"
+SHARD_SUFFIX = ".tar"
+INDEX_SUFFIX = ".index.json"
+FORMAT = "p2c-shard-v1"
+
+
+@dataclass(frozen=True)
+class SampleEntry:
+    cls: str
+    name: str
+    offset: int = -1  # data offset inside the shard, -1 for loose files
+    size: int = 0
+    sha1: str | None = None
+    path: Path | None = None  # loose-folder layout only
+
+
+def index_path_for(shard_path: Path) -> Path:
+    return shard_path.with_name(shard_path.name[: -len(SHARD_SUFFIX)] + INDEX_SUFFIX)
+
+
+def is_shard(sample_path: Path) -> bool:
+    return sample_path.suffix == SHARD_SUFFIX and sample_path.is_file()
+
+
+class ShardWriter:
+    """
+    Packs sampled images into one uncompressed tar (WebDataset-style members
+    `<class>/<name>`), written front to back in a single pass, plus a compact JSON
+    index of class, data offset, size and sha1 so readers can seek straight to an entry
+    """
+
+    def __init__(self, shard_path: Path):
+        self.shard_path = shard_path
+        shard_path.parent.mkdir(parents=True, exist_ok=True)
+        # PAX: member names of any length/charset (USTAR stops at 100 bytes); the index
+        # offsets account for the extended headers tobuf() emits for such names
+        self._tar = tarfile.open(shard_path, "w", format=tarfile.PAX_FORMAT)
+        self._entries: List[dict] = []
+
+    def add(self, cls: str, name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(f"{cls}/{name}")
+        info.size = len(data)
+        header = info.tobuf(self._tar.format, self._tar.encoding, self._tar.errors)
+        offset = self._tar.offset + len(header)
+        self._tar.addfile(info, io.BytesIO(data))
+        self._entries.append({
+            "class": cls, "name": name, "offset": offset, "size": len(data),
+            "sha1": hashlib.sha1(data).hexdigest(),
+        })
+
+    def close(self) -> Path:
+        self._tar.close()
+        index = {"format": FORMAT, "shard": self.shard_path.name, "entries": self._entries}
+        write_text(index_path_for(self.shard_path), json.dumps(index, separators=(",", ":")))
+        return self.shard_path
+
+
+class FolderWriter:
+    """Loose layout: sample_dir/<class>/<name> (kept as an export option)"""
+
+    def __init__(self, sample_dir: Path):
+        self.sample_dir = sample_dir
+        sample_dir.mkdir(parents=True, exist_ok=True)
+
+    def add(self, cls: str, name: str, data: bytes) -> None:
+        dest = self.sample_dir / cls
+        dest.mkdir(parents=True, exist_ok=True)
+        (dest / name).write_bytes(data)
+
+    def close(self) -> Path:
+        return self.sample_dir
+
+
+def open_sample_writer(out_dir: Path, fmt: str) -> ShardWriter | FolderWriter:
+    if fmt == "folders":
+        return FolderWriter(out_dir / SAMPLE_NAME)
+    if fmt != "shard":
+        raise ValueError(f"Unknown sample format '{fmt}' (expected 'shard' or 'folders')")
+    return ShardWriter(out_dir / f"{SAMPLE_NAME}{SHARD_SUFFIX}")
+
+
+def list_samples(sample_path: Path) -> List[SampleEntry]:
+    """Entries of a shard (from its index, no image reads) or of a loose class-folder sample"""
+    if is_shard(sample_path):
+        index = json.loads(index_path_for(sample_path).read_text(encoding="utf-8"))
+        return [
+            SampleEntry(e["class"], e["name"], e["offset"], e["size"], e.get("sha1"))
+            for e in index["entries"]
+        ]
+    # written by this run: always re-listed, never persisted
+    index = dataset_index(sample_path, refresh=True, persist=False)
+    return [SampleEntry(e.path.split("/", 1)[0], e.path.rsplit("/", 1)[-1], path=sample_path / e.path)
+            for e in index.files() if "/" in e.path]
+
+
+def read_samples(sample_path: Path, entries: List[SampleEntry]) -> Iterator[Tuple[SampleEntry, bytes]]:
+    """Bytes of the given entries; shard entries are read through one handle in offset order"""
+    if not is_shard(sample_path):
+        for e in entries:
+            yield e, e.path.read_bytes()
+        return
+    with sample_path.open("rb") as f:
+        for e in sorted(entries, key=lambda e: e.offset):
+            f.seek(e.offset)
+            yield e, f.read(e.size)
+
+
+def iter_samples(sample_path: Path) -> Iterator[Tuple[SampleEntry, bytes]]:
+    """Every sampled image: one sequential read of the shard (or of each loose file)"""
+    yield from read_samples(sample_path, list_samples(sample_path))
+
+
+def export_folders(shard_path: Path, dest_dir: Path) -> Path:
+    """Unpack a shard into the loose sample_dir/<class>/<name> layout"""
+    if dest_dir.exists():
+        shutil.rmtree(dest_dir)
+    writer = FolderWriter(dest_dir)
+    for e, data in iter_samples(shard_path):
+        writer.add(e.cls, e.name, data)
+    return writer.close()
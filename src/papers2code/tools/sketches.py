@@ -0,0 +1,132 @@
+import hashlib
+import math
+import random
+from typing import Any, Iterable, List
+
+import numpy as np
+
+
+def hash64(value: Any) -> int:
+    """Stable 64-bit hash (unlike hash(), identical across processes and runs)"""
+    data = value if isinstance(value, bytes) else str(value).encode("utf-8", "surrogatepass")
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def splitmix64(x: np.ndarray) -> np.ndarray:
+    """Vectorized 64-bit mixer for numeric values (uint64 view of float64 or int64)"""
+    z = x.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        z += np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+class HyperLogLog:
+    """
+    Cardinality estimate in 2**p registers (p=12 -> 4 KB, ~1.6% standard error)
+    Mergeable: merging two sketches estimates the cardinality of the union
+    """
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, value: Any) -> None:
+        self.add_hash(hash64(value))
+
+    def add_hash(self, h: int) -> None:
+        idx = h & (self.m - 1)
+        w = h >> self.p
+        rank = (64 - self.p) - w.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def update(self, values: Iterable[Any]) -> None:
+        self.add_hashes(np.fromiter((hash64(v) for v in values), dtype=np.uint64))
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if hashes.size == 0:
+            return
+        h = hashes.astype(np.uint64, copy=False)
+        idx = (h & np.uint64(self.m - 1)).astype(np.intp)
+        w = (h >> np.uint64(self.p)).astype(np.float64)  # < 2**52: exact in float64
+        bit_length = np.frexp(w)[1]  # 0 for w == 0
+        rank = ((64 - self.p) - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if est <= 2.5 * m and zeros:
+            est = m * math.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(est))
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty): a stack of compactors whose capacities
+    shrink geometrically with depth. Memory is O(k) regardless of stream length;
+    rank error is roughly 1.7/k. Mergeable across chunks, files and workers
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.compactors: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(c) for c in self.compactors)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def _compress(self) -> None:
+        while self._size() > self._max_size():
+            for h, items in enumerate(self.compactors):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.compactors):
+                    self.compactors.append([])
+                items.sort()
+                keep = [items.pop()] if len(items) % 2 else []
+                self.compactors[h + 1].extend(items[self._rng.randint(0, 1)::2])
+                self.compactors[h] = keep
+                break
+
+    def update(self, values: Iterable[float]) -> None:
+        before = len(self.compactors[0])
+        self.compactors[0].extend(float(v) for v in values)
+        self.n += len(self.compactors[0]) - before
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for h, items in enumerate(other.compactors):
+            self.compactors[h].extend(items)
+        self.n += other.n
+        self._compress()
+
+    def quantiles(self, qs: Iterable[float]) -> List[float | None]:
+        weighted = sorted((v, 1 << h) for h, items in enumerate(self.compactors) for v in items)
+        qs = list(qs)
+        if not weighted:
+            return [None] * len(qs)
+        cum = np.cumsum([w for _, w in weighted])
+        out: List[float | None] = []
+        for q in qs:
+            i = int(np.searchsorted(cum, q * cum[-1], side="left"))
+            out.append(weighted[min(i, len(weighted) - 1)][0])
+        return out
@@ -0,0 +1,287 @@
+import csv
+import gzip
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from papers2code.tools.file_index import dataset_index
+from papers2code.tools.sketches import HyperLogLog, KLLSketch, hash64, splitmix64
+
+
+TABULAR_EXTS = (".csv", ".csv.gz", ".parquet")
+CHUNK_ROWS = 10_000
+TOP_VALUES_MAX = 1_000  # distinct values tracked exactly per column (bounded memory)
+TARGET_NAMES = ("target", "label", "labels", "class", "y", "outcome", "category")
+NULL_TOKENS = {"", "na", "n/a", "nan", "null", "none", "?"}
+QUANTILES = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+Chunk = Tuple[List[str], List[List[Any]]]  # (column names, column-major values)
+
+
+def find_tabular_files(dataset_dir: Path) -> List[Path]:
+    """Tabular files, train-like names first, then largest first"""
+    files = sorted(dataset_index(dataset_dir).files(TABULAR_EXTS),
+                   key=lambda e: ("train" not in e.path.rsplit("/", 1)[-1].lower(), -e.size, e.path))
+    return [dataset_dir / e.path for e in files]
+
+
+def _open_text(path: Path):
+    opener = gzip.open if path.name.lower().endswith(".gz") else open
+    return opener(path, "rt", encoding="utf-8", errors="replace", newline="")
+
+
+def _csv_header(path: Path) -> List[str]:
+    with _open_text(path) as f:
+        return next(csv.reader(f), None) or []
+
+
+def _iter_csv_stdlib(path: Path, max_rows: int) -> Iterator[Chunk]:
+    with _open_text(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        rows: List[List[str]] = []
+        seen = 0
+        for row in reader:
+            if seen >= max_rows:
+                break
+            rows.append(row)
+            seen += 1
+            if len(rows) == CHUNK_ROWS:
+                yield header, _columns(header, rows)
+                rows = []
+        if rows:
+            yield header, _columns(header, rows)
+
+
+def _columns(header: List[str], rows: List[List[str]]) -> List[List[Any]]:
+    width = len(header)
+    return [[r[i] if i < len(r) else None for r in rows] for i in range(width)]
+
+
+def _iter_arrow(path: Path, max_rows: int) -> Iterator[Chunk]:
+    """Streaming record batches via pyarrow (optional dependency)"""
+    if path.name.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=CHUNK_ROWS)
+    else:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        # Every column is read as strings and typed by _kind, as with the stdlib reader:
+        # arrow infers types from the first block only, so a later block with a value
+        # that does not convert (e.g. "oops" in an int column) would abort the read
+        header = _csv_header(path)
+        if not header:
+            return
+        batches = pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=8 << 20),
+            convert_options=pacsv.ConvertOptions(column_types={name: pa.string() for name in header}),
+        )
+    seen = 0
+    for batch in batches:
+        if seen >= max_rows:
+            break
+        batch = batch.slice(0, max_rows - seen)
+        seen += batch.num_rows
+        yield list(batch.schema.names), [col.to_pylist() for col in batch.columns]
+
+
+def iter_table_chunks(path: Path, max_rows: int) -> Iterator[Chunk]:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if path.name.lower().endswith(".parquet"):
+            raise RuntimeError(f"Reading {path.name} requires pyarrow (pip install pyarrow)")
+        return _iter_csv_stdlib(path, max_rows)
+    return _iter_arrow(path, max_rows)
+
+
+class _Nested(str):
+    """JSON text of a list/struct cell (Parquet nested columns), hashable for counting"""
+
+
+def _hashable(v: Any) -> Any:
+    return _Nested(json.dumps(v, sort_keys=True, default=str)) if isinstance(v, (list, dict)) else v
+
+
+def _kind(v: Any) -> Tuple[str, float | None]:
+    """Classify one cell -> (type name, numeric value if any). Strings are parsed (stdlib CSV)"""
+    if isinstance(v, _Nested):
+        return "nested", None
+    if isinstance(v, bool):
+        return "bool", float(v)
+    if isinstance(v, int):
+        return "int", float(v)
+    if isinstance(v, float):
+        return "float", v
+    if isinstance(v, str):
+        s = v.strip()
+        if s.lower() in ("true", "false"):
+            return "bool", float(s.lower() == "true")
+        try:
+            return "int", float(int(s))
+        except ValueError:
+            pass
+        try:
+            return "float", float(s)
+        except ValueError:
+            return "string", None
+    return type(v).__name__, None
+
+
+def _is_null(v: Any) -> bool:
+    if v is None:
+        return True
+    if isinstance(v, float) and v != v:
+        return True
+    return isinstance(v, str) and v.strip().lower() in NULL_TOKENS
+
+
+class _ColumnProfile:
+    def __init__(self) -> None:
+        self.count = 0
+        self.nulls = 0
+        self.types: Counter = Counter()
+        self.hll = HyperLogLog()
+        self.kll = KLLSketch()
+        self.top: Counter = Counter()
+        self.top_overflow = False
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def update(self, values: List[Any]) -> None:
+        """Work per distinct value of the chunk (HLL and type checks are idempotent)"""
+        self.count += len(values)
+        nums: List[float] = []
+        num_counts: List[int] = []
+        text_hashes: List[int] = []
+        try:
+            distinct = Counter(values)
+        except TypeError:  # list/struct cells
+            distinct = Counter(_hashable(v) for v in values)
+        for v, cnt in distinct.items():
+            if _is_null(v):
+                self.nulls += cnt
+                continue
+            kind, num = _kind(v)
+            self.types[kind] += cnt
+            if num is not None and num == num:
+                nums.append(num)
+                num_counts.append(cnt)
+            else:
+                text_hashes.append(hash64(v))
+            key = str(v)
+            if key in self.top or len(self.top) < TOP_VALUES_MAX:
+                self.top[key] += cnt
+            else:
+                self.top_overflow = True
+        if text_hashes:
+            self.hll.add_hashes(np.array(text_hashes, dtype=np.uint64))
+        if nums:
+            arr = np.array(nums, dtype=np.float64)
+            self.hll.add_hashes(splitmix64(arr.view(np.uint64)))
+            self.kll.update(np.repeat(arr, num_counts).tolist())
+            lo, hi = float(arr.min()), float(arr.max())
+            self.min = lo if self.min is None else min(self.min, lo)
+            self.max = hi if self.max is None else max(self.max, hi)
+
+    def dtype(self) -> str:
+        if not self.types:
+            return "empty"
+        kinds = set(self.types)
+        if kinds <= {"int"}:
+            return "int"
+        if kinds <= {"int", "float"}:
+            return "float"
+        if kinds == {"bool"}:
+            return "bool"
+        return self.types.most_common(1)[0][0] if len(kinds) == 1 else "mixed"
+
+    def summary(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "type": self.dtype(),
+            "null_rate": round(self.nulls / self.count, 4) if self.count else 0.0,
+            "distinct_estimate": self.hll.estimate(),
+        }
+        if self.kll.n and out["type"] in ("int", "float"):
+            qs = self.kll.quantiles(QUANTILES)
+            qs[0], qs[-1] = self.min, self.max  # extremes are tracked exactly
+            out["quantiles"] = {f"p{int(q * 100)}": v for q, v in zip(QUANTILES, qs)}
+        return out
+
+
+def _pick_target(names: List[str], cols: Dict[str, _ColumnProfile]) -> str | None:
+    for n in names:
+        if n.strip().lower() in TARGET_NAMES:
+            return n
+    last = names[-1] if names else None
+    if last and not cols[last].top_overflow and 1 < cols[last].hll.estimate() <= 50:
+        return last
+    return None
+
+
+def profile_table(path: Path, max_rows: int) -> Dict[str, Any]:
+    """
+    Stream one CSV/Parquet file in chunks (up to max_rows) and keep only mergeable
+    sketches per column: type counts, nulls, HyperLogLog cardinality, KLL quantiles
+    and a capped exact value counter (for the target class balance)
+    """
+    names: List[str] = []
+    cols: Dict[str, _ColumnProfile] = {}
+    rows = 0
+    truncated = False
+    # one row past the budget tells a file of exactly max_rows rows from a longer one
+    for header, columns in iter_table_chunks(path, max_rows + 1):
+        if not names:
+            names = list(header)
+            cols = {n: _ColumnProfile() for n in names}
+        if columns and rows + len(columns[0]) > max_rows:
+            truncated = True
+            columns = [values[:max_rows - rows] for values in columns]
+        for n, values in zip(names, columns):
+            cols[n].update(values)
+        rows += len(columns[0]) if columns else 0
+
+    target = _pick_target(names, cols) if names else None
+    balance = None
+    if target and not cols[target].top_overflow:
+        counts = dict(cols[target].top.most_common())
+        balance = {
+            "column": target,
+            "counts": counts,
+            "imbalance_ratio": round(max(counts.values()) / min(counts.values()), 3) if counts else None,
+        }
+    return {
+        "file": path.name,
+        "rows_profiled": rows,
+        "truncated": truncated,
+        "columns": {n: cols[n].summary() for n in names},
+        "target": balance,
+    }
+
+
+def profile_tabular(dataset_dir: Path, max_rows: int) -> Dict[str, Any]:
+    """
+    Profile every tabular file of a dataset, sharing one row budget (samples_max_rows)
+    so memory and time stay bounded however large the files are
+    """
+    budget = max_rows
+    tables: List[Dict[str, Any]] = []
+    files = find_tabular_files(dataset_dir)
+    for path in files:
+        if budget <= 0:
+            break
+        prof = profile_table(path, budget)
+        budget -= prof["rows_profiled"]
+        tables.append(prof)
+    return {
+        "modality": "tabular",
+        "files": [str(p.relative_to(dataset_dir)) for p in files],
+        "max_rows": max_rows,
+        "tables": tables,
+    }
@@ -0,0 +1,333 @@
+import gzip
+import json
+import os
+import re
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from papers2code.tools.file_index import dataset_index
+from papers2code.tools.sketches import HyperLogLog, KLLSketch, splitmix64
+from papers2code.tools.tabular_profiler import TARGET_NAMES, iter_table_chunks
+
+
+TEXT_EXTS = (".txt", ".jsonl", ".jsonl.gz", ".ndjson")
+TEXT_FIELDS = ("text", "content", "sentence", "review", "document", "body", "abstract")
+LABEL_FIELDS = TARGET_NAMES + ("sentiment",)
+SPLIT_DIRS = {"train", "training", "test", "val", "valid", "validation", "dev"}
+PER_FILE_DOCS_MIN_FILES = 50  # many small .txt files -> one document per file (e.g. aclImdb)
+TEXT_COLUMN_MIN_CHARS = 80  # mean length that makes a CSV string column "text"
+TOP_LABELS_MAX = 1_000
+RANGE_MIN_BYTES = 8 << 20  # large uncompressed line files are split into byte ranges of at least this
+
+NUM_PERM = 64
+BANDS, ROWS = 8, 8  # LSH: P(candidate) = 1 - (1 - s**8)**8, ~0.77 similarity threshold
+NEAR_DUP_JACCARD = 0.8
+SHINGLE = 3  # word n-grams
+MAX_SHINGLES = 2_000  # per document, keeps MinHash cost bounded on very long documents
+QUANTILES = (0.0, 0.25, 0.5, 0.75, 0.95, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+")
+_rng = np.random.default_rng(1234)
+_PERM_A = _rng.integers(1, 2**63 - 1, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63 - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def find_text_files(dataset_dir: Path) -> List[Path]:
+    return [
+        dataset_dir / e.path for e in dataset_index(dataset_dir).files(TEXT_EXTS)
+        if not e.path.rsplit("/", 1)[-1].lower().startswith(("readme", "license"))
+    ]
+
+
+def find_text_column(path: Path) -> Tuple[str, str | None] | None:
+    """(text column, label column) of a CSV/Parquet file whose strings look like documents"""
+    for header, columns in iter_table_chunks(path, max_rows=500):
+        best, best_len = None, 0.0
+        for name, values in zip(header, columns):
+            strs = [v for v in values if isinstance(v, str) and v]
+            if len(strs) < len(values) // 2:
+                continue
+            mean_len = sum(len(s) for s in strs) / len(strs)
+            if mean_len > best_len:
+                best, best_len = name, mean_len
+        if best is None or best_len < TEXT_COLUMN_MIN_CHARS:
+            return None
+        label = next((n for n in header if n.strip().lower() in LABEL_FIELDS and n != best), None)
+        return best, label
+    return None
+
+
+def _open_text(path: Path):
+    if path.name.lower().endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return path.open("r", encoding="utf-8", errors="replace")
+
+
+def _doc_from_json(obj: Any) -> Tuple[str, str | None] | None:
+    if isinstance(obj, str):
+        return obj, None
+    if not isinstance(obj, dict):
+        return None
+    text = next((obj[k] for k in TEXT_FIELDS if isinstance(obj.get(k), str)), None)
+    if text is None:
+        strs = [v for v in obj.values() if isinstance(v, str)]
+        text = max(strs, key=len) if strs else None
+    if text is None:
+        return None
+    label = next((obj[k] for k in LABEL_FIELDS if k in obj and not isinstance(obj[k], (dict, list))), None)
+    return text, None if label is None else str(label)
+
+
+def _iter_lines(path: Path, start: int, end: int | None) -> Iterator[str]:
+    """Lines starting in [start, end) (a line crossing start belongs to the previous range)"""
+    if path.name.lower().endswith(".gz"):  # not seekable: always one range
+        with _open_text(path) as f:
+            yield from f
+        return
+    with path.open("rb") as f:
+        pos = start
+        if start:
+            f.seek(start - 1)
+            pos += len(f.readline()) - 1
+        while end is None or pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line.decode("utf-8", errors="replace")
+
+
+def _iter_docs(task: "_Task") -> Iterator[Tuple[str, str | None]]:
+    for path in task.paths:
+        name = path.name.lower()
+        if task.mode == "file":
+            parent = path.parent
+            label = None if parent == task.root or parent.name.lower() in SPLIT_DIRS else parent.name
+            with _open_text(path) as f:
+                yield f.read(), label
+        elif task.mode == "table":
+            text_col, label_col = task.columns
+            for header, columns in iter_table_chunks(path, task.max_docs + 1):
+                cols = dict(zip(header, columns))
+                labels = cols.get(label_col) if label_col else None
+                for i, text in enumerate(cols.get(text_col) or []):
+                    if isinstance(text, str) and text:
+                        yield text, None if labels is None or labels[i] is None else str(labels[i])
+        elif name.endswith((".jsonl", ".jsonl.gz", ".ndjson")):
+            for line in _iter_lines(path, task.start, task.end):
+                if line.strip():
+                    try:
+                        doc = _doc_from_json(json.loads(line))
+                    except ValueError:
+                        continue
+                    if doc:
+                        yield doc
+        else:  # plain text: one document per non-empty line
+            for line in _iter_lines(path, task.start, task.end):
+                if line.strip():
+                    yield line.rstrip("\r\n"), None
+
+
+@dataclass
+class _Task:
+    paths: List[Path]
+    mode: str  # "file" | "line" | "table"
+    max_docs: int
+    root: Path | None = None
+    columns: Tuple[str, str | None] | None = None
+    start: int = 0  # byte range of a "line" task
+    end: int | None = None
+    size: int = 0  # bytes covered, the task's weight in the max_docs split
+
+
+@dataclass
+class _Partial:
+    """Mergeable per-task result: only sketches and fixed-size signatures"""
+    docs: int = 0
+    chars: KLLSketch = field(default_factory=KLLSketch)
+    tokens: KLLSketch = field(default_factory=KLLSketch)
+    chars_total: int = 0
+    vocab: HyperLogLog = field(default_factory=HyperLogLog)
+    labels: Counter = field(default_factory=Counter)
+    signatures: List[np.ndarray] = field(default_factory=list)
+    more: bool = False  # stopped at max_docs with documents left
+
+
+def _minhash(token_hashes: np.ndarray) -> np.ndarray:
+    """MinHash signature (NUM_PERM x uint32) over word-shingle hashes, vectorized"""
+    if token_hashes.size >= SHINGLE:
+        t = token_hashes[:MAX_SHINGLES + SHINGLE - 1]
+        with np.errstate(over="ignore"):
+            sh = t[:-2] * np.uint64(0x100000001B3) ^ t[1:-1] * np.uint64(0x9E3779B1) ^ t[2:]
+    else:
+        sh = token_hashes
+    if sh.size == 0:
+        return np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        perm = sh[:, None] * _PERM_A[None, :] + _PERM_B[None, :]
+    return (perm.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+
+def _profile_task(task: _Task) -> _Partial:
+    part = _Partial()
+    lengths_c: List[int] = []
+    lengths_t: List[int] = []
+    for text, label in _iter_docs(task):
+        if part.docs >= task.max_docs:
+            part.more = True
+            break
+        tokens = _TOKEN_RE.findall(text.lower())
+        th = splitmix64(np.fromiter((zlib.crc32(t.encode()) for t in tokens), dtype=np.uint64, count=len(tokens)))
+        part.vocab.add_hashes(np.unique(th))
+        part.signatures.append(_minhash(th))
+        lengths_c.append(len(text))
+        lengths_t.append(len(tokens))
+        part.chars_total += len(text)
+        if label is not None and (label in part.labels or len(part.labels) < TOP_LABELS_MAX):
+            part.labels[label] += 1
+        part.docs += 1
+        if len(lengths_c) >= 10_000:
+            part.chars.update(lengths_c)
+            part.tokens.update(lengths_t)
+            lengths_c, lengths_t = [], []
+    part.chars.update(lengths_c)
+    part.tokens.update(lengths_t)
+    return part
+
+
+def _near_duplicate_rate(signatures: np.ndarray) -> float:
+    """LSH banding to find candidate pairs, confirmed by estimated Jaccard >= NEAR_DUP_JACCARD"""
+    n = signatures.shape[0]
+    if n < 2:
+        return 0.0
+    buckets: List[Dict[bytes, int]] = [{} for _ in range(BANDS)]
+    dups = 0
+    for i in range(n):
+        sig = signatures[i]
+        is_dup = False
+        for b in range(BANDS):
+            key = sig[b * ROWS:(b + 1) * ROWS].tobytes()
+            j = buckets[b].get(key)
+            if j is None:
+                buckets[b][key] = i
+            elif not is_dup and np.mean(signatures[j] == sig) >= NEAR_DUP_JACCARD:
+                is_dup = True
+        dups += is_dup
+    return dups / n
+
+
+def _allot(tasks: List[_Task], max_docs: int) -> None:
+    """
+    Split max_docs over the tasks in proportion to their bytes (largest remainder);
+    a "file" task never gets more than its file count, the surplus goes to the others
+    """
+    open_tasks = list(tasks)
+    budget = max_docs
+    while open_tasks:
+        weight = sum(t.size for t in open_tasks)
+        raw = [budget * (t.size / weight if weight else 1 / len(open_tasks)) for t in open_tasks]
+        shares = [int(r) for r in raw]
+        for i in sorted(range(len(raw)), key=lambda i: shares[i] - raw[i])[:budget - sum(shares)]:
+            shares[i] += 1
+        capped = [(t, s) for t, s in zip(open_tasks, shares) if t.mode == "file" and s >= len(t.paths)]
+        if not capped:
+            for t, s in zip(open_tasks, shares):
+                t.max_docs = s
+            return
+        for t, _ in capped:
+            t.max_docs = len(t.paths)
+            budget -= t.max_docs
+            open_tasks.remove(t)
+
+
+def _build_tasks(dataset_dir: Path, max_docs: int, workers: int) -> Tuple[List[_Task], List[Path]]:
+    """Tasks planned up front, each with a fixed share of max_docs (no task is ever re-read)"""
+    files = find_text_files(dataset_dir)
+    tasks: List[_Task] = []
+    txt = [p for p in files if p.name.lower().endswith(".txt")]
+    rest = [p for p in files if not p.name.lower().endswith(".txt")]
+    if len(txt) >= PER_FILE_DOCS_MIN_FILES:
+        # batch small files so each worker task amortizes its startup
+        for i in range(0, len(txt), 256):
+            batch = txt[i:i + 256]
+            tasks.append(_Task(batch, "file", 0, root=dataset_dir, size=sum(p.stat().st_size for p in batch)))
+    else:
+        rest = txt + rest
+    sizes = [p.stat().st_size for p in rest]
+    # big files are split so every worker gets a part; each range is read once, from its offset
+    step = max(RANGE_MIN_BYTES, sum(sizes) // (workers * 4) + 1)
+    for p, size in zip(rest, sizes):
+        if p.name.lower().endswith(".gz") or size <= step:
+            tasks.append(_Task([p], "line", 0, size=size))
+            continue
+        for start in range(0, size, step):
+            end = start + step if start + step < size else None
+            tasks.append(_Task([p], "line", 0, start=start, end=end, size=min(step, size - start)))
+
+    if not tasks:  # CSV/Parquet corpora: profile the document-like column
+        from papers2code.tools.tabular_profiler import find_tabular_files
+        for p in find_tabular_files(dataset_dir):
+            cols = find_text_column(p)
+            if cols:
+                tasks.append(_Task([p], "table", 0, columns=cols, size=p.stat().st_size))
+                files.append(p)
+    _allot(tasks, max_docs)
+    return tasks, files
+
+
+def has_text_table(dataset_dir: Path) -> bool:
+    """True when a CSV/Parquet dataset is really a corpus (a document-like string column)"""
+    from papers2code.tools.tabular_profiler import find_tabular_files
+    return any(find_text_column(p) for p in find_tabular_files(dataset_dir)[:3])
+
+
+def profile_text(dataset_dir: Path, max_docs: int, workers: int | None = None) -> Dict[str, Any]:
+    """
+    Streaming corpus profile over JSONL/TXT files or a CSV text column, bounded by
+    max_docs (samples_max_rows). Files are profiled in a process pool; each task
+    returns mergeable sketches: KLL length quantiles, HyperLogLog vocabulary size,
+    capped label counts and MinHash signatures for LSH near-duplicate detection
+    Files (and byte ranges of large files) are planned up front and each task gets a
+    fixed share of max_docs in proportion to its bytes, so every statistic covers the
+    same documents, never more than max_docs, and every byte is read at most once. A
+    range denser than average may stop at its share while the corpus is under max_docs
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks, files = _build_tasks(dataset_dir, max_docs, workers)
+    total = _Partial()
+    truncated = False
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map keeps task order, so the merge (and the near-duplicate pass) is deterministic
+        for part in pool.map(_profile_task, [t for t in tasks if t.max_docs > 0]):
+            total.docs += part.docs
+            total.chars.merge(part.chars)
+            total.tokens.merge(part.tokens)
+            total.chars_total += part.chars_total
+            total.vocab.merge(part.vocab)
+            total.labels.update(part.labels)
+            total.signatures += part.signatures
+            truncated |= part.more
+    truncated |= any(t.max_docs == 0 and t.size for t in tasks)  # tasks left without a share
+
+    sigs = np.stack(total.signatures) if total.signatures else np.zeros((0, NUM_PERM), dtype=np.uint32)
+    names = [f"p{int(q * 100)}" for q in QUANTILES]
+    labels = dict(total.labels.most_common()) if total.labels else None
+    return {
+        "modality": "text",
+        "files": [str(p.relative_to(dataset_dir)) for p in files],
+        "documents": total.docs,
+        "truncated": truncated,
+        "mean_chars": round(total.chars_total / total.docs, 1) if total.docs else 0.0,
+        "length_chars": dict(zip(names, total.chars.quantiles(QUANTILES))),
+        "length_tokens": dict(zip(names, total.tokens.quantiles(QUANTILES))),
+        "vocab_size_estimate": total.vocab.estimate(),
+        "near_duplicate_rate": round(_near_duplicate_rate(sigs), 4),
+        "labels": labels,
+        "imbalance_ratio": round(max(labels.values()) / min(labels.values()), 3) if labels else None,
+    }